@@ -1,11 +1,27 @@
 
-from flask import Flask, render_template, request, jsonify
-from datetime import datetime
+from flask import Flask, render_template, request, jsonify, g, send_from_directory
+from datetime import datetime, date, timedelta, timezone
 import sqlite3
 import os
 import json
 
 import sys
+import time
+import hashlib
+
+try:
+    import nh3
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.tasklists import tasklists_plugin
+except ImportError:
+    # Render markdown di server opsional, client fallback ke marked.js
+    MarkdownIt = None
+
+import related_notes
+import reminders
+import repository
+import vendor_assets
+import workspaces
 
 app = Flask(__name__)
 
@@ -19,16 +35,251 @@ def get_db_path():
     return os.path.join(base_dir, 'tracking.db')
 
 DATABASE = get_db_path()
-
-def get_db():
-    conn = sqlite3.connect(DATABASE)
+# Folder aplikasi (di samping executable kalau di-bundle); path file data tidak bergantung pada current directory
+BASE_DIR = os.path.dirname(DATABASE)
+ARCHIVE_DATABASE = os.path.join(os.path.dirname(DATABASE), 'tracking_archive.db')
+UPLOAD_DIR = os.path.join(BASE_DIR, 'static', 'uploads')
+RELATED_INDEX_PATH = os.path.join(os.path.dirname(DATABASE), 'related_notes_index.npz')
+
+# Task yang selesai sebelum cutoff ini dipindahkan ke archive database
+app.config.setdefault('ARCHIVE_AFTER_DAYS', 180)
+app.config.setdefault('ARCHIVE_BATCH_SIZE', 500)
+
+TASK_COLUMNS = ('id', 'title', 'description', 'status', 'priority', 'project', 'due_date',
+                'created_at', 'started_at', 'completed_at', 'time_spent')
+TIME_LOG_COLUMNS = ('id', 'task_id', 'start_time', 'end_time', 'duration')
+
+# Snapshot backup otomatis
+app.config.setdefault('BACKUP_INTERVAL_HOURS', 24)
+app.config.setdefault('BACKUP_KEEP', 7)
+app.config.setdefault('BACKUP_PAGES_PER_STEP', 256)
+
+# Maintenance database hanya jalan setelah app idle selama ini
+app.config.setdefault('MAINTENANCE_IDLE_SECONDS', 120)
+app.config.setdefault('MAINTENANCE_VACUUM_PAGES', 200)
+
+# Save PATCH berturut-turut dalam jendela ini digabung ke satu entri note_versions
+app.config.setdefault('NOTE_VERSION_COALESCE_SECONDS', 120)
+
+# Entri change journal yang lebih tua dari ini dibuang saat compaction
+app.config.setdefault('CHANGE_JOURNAL_RETAIN_DAYS', 30)
+
+# Reminder 'due_soon' dikirim sekian jam sebelum akhir hari due date
+app.config.setdefault('REMINDER_LEAD_HOURS', 24)
+
+# Folder database workspace selain default (None: folder 'workspaces' di samping database default)
+app.config.setdefault('WORKSPACES_DIR', None)
+
+# Nama tabel di API sync -> nama tabel di database
+SYNC_TABLES = {
+    'tasks': 'tasks',
+    'time_logs': 'time_logs',
+    'notes': 'notes',
+    'folders': 'folders',
+    'credentials': 'server_credentials',
+}
+
+def get_workspaces_dir():
+    return app.config['WORKSPACES_DIR'] or os.path.join(os.path.dirname(DATABASE), 'workspaces')
+
+def default_workspace():
+    # Dibangun dari variabel modul setiap kali, supaya DATABASE dkk. tetap bisa diganti (script, benchmark)
+    return workspaces.Workspace(workspaces.DEFAULT_WORKSPACE, DATABASE, ARCHIVE_DATABASE, UPLOAD_DIR, RELATED_INDEX_PATH)
+
+def get_workspace(name):
+    """Workspace bernama `name`; databasenya belum tentu sudah ada."""
+    if name == workspaces.DEFAULT_WORKSPACE:
+        return default_workspace()
+    # Attachment tetap di bawah static/ supaya link /static/uploads/... tetap bisa dibuka
+    return workspaces.workspace_at(get_workspaces_dir(), os.path.join(UPLOAD_DIR, 'workspaces'), name)
+
+def workspace_exists(workspace):
+    return workspace.name == workspaces.DEFAULT_WORKSPACE or os.path.exists(workspace.database)
+
+def list_workspaces():
+    return [default_workspace()] + [get_workspace(name) for name in workspaces.list_names(get_workspaces_dir())]
+
+def current_workspace():
+    """Workspace request (atau job background) yang sedang berjalan; default kalau tidak ada."""
+    return workspaces.current() or default_workspace()
+
+def get_db(with_archive=False):
+    conn = sqlite3.connect(current_workspace().database)
     conn.row_factory = sqlite3.Row
+    if with_archive:
+        attach_archive(conn)
+    return conn
+
+def attach_archive(conn):
+    conn.execute('ATTACH DATABASE ? AS archive', (current_workspace().archive_database,))
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS archive.tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'todo',
+            priority TEXT DEFAULT 'medium',
+            project TEXT,
+            due_date DATE,
+            created_at TIMESTAMP,
+            started_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            time_spent INTEGER DEFAULT 0,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS archive.time_logs (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER,
+            start_time TIMESTAMP,
+            end_time TIMESTAMP,
+            duration INTEGER
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_time_logs_task ON time_logs (task_id)')
+
+def include_archived_requested():
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+def get_task_db(task_id):
+    """Connection untuk operasi pada satu task. Task yang sudah diarsipkan dipindah kembali ke tabel aktif."""
+    conn = get_db()
+    if not os.path.exists(current_workspace().archive_database):
+        return conn
+    if conn.execute('SELECT 1 FROM tasks WHERE id=?', (task_id,)).fetchone():
+        return conn
+    attach_archive(conn)
+    unarchive_task(conn, task_id)
     return conn
 
+def unarchive_task(conn, task_id):
+    cursor = conn.cursor()
+    cursor.execute('SELECT status, time_spent FROM archive.tasks WHERE id=?', (task_id,))
+    task = cursor.fetchone()
+    if not task:
+        return False
+
+    task_columns = ', '.join(TASK_COLUMNS)
+    log_columns = ', '.join(TIME_LOG_COLUMNS)
+    cursor.execute(f'INSERT INTO main.tasks ({task_columns}) SELECT {task_columns} FROM archive.tasks WHERE id=?', (task_id,))
+    cursor.execute(f'INSERT INTO main.time_logs ({log_columns}) SELECT {log_columns} FROM archive.time_logs WHERE task_id=?', (task_id,))
+
+    time_spent = task['time_spent'] or 0
+    cursor.execute(
+        'UPDATE archived_task_rollups SET task_count = task_count - 1, time_spent_total = time_spent_total - ?, timed_task_count = timed_task_count - ? WHERE status=?',
+        (time_spent, 1 if time_spent > 0 else 0, task['status'])
+    )
+    cursor.execute('DELETE FROM archive.time_logs WHERE task_id=?', (task_id,))
+    cursor.execute('DELETE FROM archive.tasks WHERE id=?', (task_id,))
+    conn.commit()
+    return True
+
+def archive_completed_tasks(before=None, batch_size=None):
+    """Pindahkan task 'done' yang selesai sebelum cutoff (beserta time_logs-nya) ke archive database.
+
+    Dikerjakan per batch, satu transaksi per batch, supaya writer lain tidak terblokir lama.
+    """
+    batch_size = batch_size or app.config['ARCHIVE_BATCH_SIZE']
+    conn = get_db(with_archive=True)
+    cursor = conn.cursor()
+
+    if before is None:
+        cursor.execute("SELECT datetime('now', ?)", (f"-{int(app.config['ARCHIVE_AFTER_DAYS'])} days",))
+        before = cursor.fetchone()[0]
+
+    task_columns = ', '.join(TASK_COLUMNS)
+    log_columns = ', '.join(TIME_LOG_COLUMNS)
+    archived = 0
+
+    while True:
+        # Task dengan timer yang masih berjalan tidak ikut diarsipkan
+        cursor.execute('''
+            SELECT id FROM main.tasks
+            WHERE status = 'done' AND completed_at IS NOT NULL AND completed_at < ?
+            AND id NOT IN (SELECT task_id FROM main.time_logs WHERE end_time IS NULL AND task_id IS NOT NULL)
+            LIMIT ?
+        ''', (before, batch_size))
+        task_ids = [row['id'] for row in cursor.fetchall()]
+        if not task_ids:
+            break
+
+        placeholders = ', '.join('?' * len(task_ids))
+        cursor.execute(f'''
+            SELECT status,
+                   COUNT(*) as task_count,
+                   COALESCE(SUM(time_spent), 0) as time_spent_total,
+                   SUM(CASE WHEN time_spent > 0 THEN 1 ELSE 0 END) as timed_task_count
+            FROM main.tasks
+            WHERE id IN ({placeholders})
+            GROUP BY status
+        ''', task_ids)
+        for rollup in cursor.fetchall():
+            cursor.execute('''
+                INSERT INTO archived_task_rollups (status, task_count, time_spent_total, timed_task_count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(status) DO UPDATE SET
+                    task_count = task_count + excluded.task_count,
+                    time_spent_total = time_spent_total + excluded.time_spent_total,
+                    timed_task_count = timed_task_count + excluded.timed_task_count
+            ''', (rollup['status'], rollup['task_count'], rollup['time_spent_total'], rollup['timed_task_count']))
+
+        cursor.execute(f'INSERT INTO archive.tasks ({task_columns}) SELECT {task_columns} FROM main.tasks WHERE id IN ({placeholders})', task_ids)
+        cursor.execute(f'INSERT INTO archive.time_logs ({log_columns}) SELECT {log_columns} FROM main.time_logs WHERE task_id IN ({placeholders})', task_ids)
+        cursor.execute(f'DELETE FROM main.time_logs WHERE task_id IN ({placeholders})', task_ids)
+        cursor.execute(f'DELETE FROM main.tasks WHERE id IN ({placeholders})', task_ids)
+        conn.commit()
+        archived += len(task_ids)
+
+    conn.close()
+    return archived
+
+# Waktu request terakhir, dipakai scheduler maintenance untuk mendeteksi idle
+last_request_at = time.monotonic()
+
+# Request otomatis (polling reminder tiap menit, file static) bukan aktivitas user,
+# kalau ikut dihitung app tidak pernah idle dan job maintenance tidak pernah jalan
+BACKGROUND_ENDPOINTS = {'get_reminders', 'static'}
+
+@app.before_request
+def track_activity():
+    global last_request_at
+    if request.endpoint not in BACKGROUND_ENDPOINTS:
+        last_request_at = time.monotonic()
+
+@app.before_request
+def select_workspace():
+    """Arahkan request ke database workspace-nya: header X-Workspace, ?workspace=, lalu cookie 'workspace'."""
+    name = request.headers.get('X-Workspace') or request.args.get('workspace')
+    if name:
+        workspace = get_workspace(name) if workspaces.is_valid_name(name) else None
+        if workspace is None or not workspace_exists(workspace):
+            return jsonify({'message': 'Workspace not found'}), 404
+    else:
+        # Cookie dari workspace yang sudah tidak ada jatuh ke default, bukan 404 di setiap request
+        name = request.cookies.get('workspace')
+        workspace = get_workspace(name) if workspaces.is_valid_name(name) else None
+        if workspace is None or not workspace_exists(workspace):
+            workspace = default_workspace()
+
+    workspaces.ensure_initialized(workspace, init_workspace)
+    g.workspace_token = workspaces.activate(workspace)
+
+@app.teardown_request
+def release_workspace(exc):
+    token = g.pop('workspace_token', None)
+    if token is not None:
+        workspaces.deactivate(token)
+
 def init_db():
     conn = get_db()
     cursor = conn.cursor()
 
+    # Harus diset sebelum tabel pertama dibuat; di database lama tidak berpengaruh sampai `python main.py vacuum`
+    cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    # WAL supaya reader (dan job maintenance/backup) tidak memblokir writer
+    cursor.execute('PRAGMA journal_mode=WAL')
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -169,27 +420,208 @@ def init_db():
     if 'folder_id' not in columns:
         cursor.execute('ALTER TABLE notes ADD COLUMN folder_id INTEGER REFERENCES folders(id) ON DELETE SET NULL')
 
+    # Query due date (overdue, due today, range) dan reminder memakai range scan di index ini
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due_date, status)')
+
+    # Tags dan jumlah attachment di list notes dihitung per note
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_note_tags_note ON note_tags (note_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_note_attachments_note ON note_attachments (note_id)')
+
+    # Rollup dari task yang sudah diarsipkan, supaya total dashboard tetap benar
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_task_rollups (
+            status TEXT PRIMARY KEY,
+            task_count INTEGER DEFAULT 0,
+            time_spent_total INTEGER DEFAULT 0,
+            timed_task_count INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Change journal untuk delta sync ke client
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_journal (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_journal_row ON change_journal (table_name, row_id, seq)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    ''')
+
+    for table_name in SYNC_TABLES.values():
+        for op, ref in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS journal_{table_name}_{op}
+                AFTER {op.upper()} ON {table_name}
+                BEGIN
+                    INSERT INTO change_journal (table_name, row_id, op) VALUES ('{table_name}', {ref}.id, '{op}');
+                END
+            ''')
+
+    # attachment_count ikut dikirim di list notes, jadi perubahan attachment dicatat sebagai update note
+    for op, ref in (('insert', 'NEW'), ('delete', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS journal_note_attachments_{op}
+            AFTER {op.upper()} ON note_attachments
+            BEGIN
+                INSERT INTO change_journal (table_name, row_id, op) VALUES ('notes', {ref}.note_id, 'update');
+            END
+        ''')
+
+    # Cache HTML hasil render markdown per note, valid selama content_hash sama
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS note_render_cache (
+            note_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            html TEXT NOT NULL,
+            rendered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INTEGER,
+            result TEXT,
+            page_count INTEGER,
+            freelist_count INTEGER,
+            db_size INTEGER
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_log_job ON maintenance_log (job, started_at)')
+
     conn.commit()
     conn.close()
 
+    compact_change_journal()
+
+def init_workspace():
+    """init_db untuk workspace aktif. Kalau reminder scheduler sudah jalan, workspace ini ikut dijadwalkan."""
+    init_db()
+    if reminders.loaded_scheduler(DATABASE) is not None:
+        start_reminder_scheduler()
+
+def init_workspaces():
+    for workspace in list_workspaces():
+        workspaces.ensure_initialized(workspace, init_workspace)
+
+def get_change_seq(cursor):
+    row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name='change_journal'").fetchone()
+    return row[0] if row else 0
+
+def json_response(payload):
+    """Response dari JSON yang sudah diserialisasi (string atau list potongan dari repository), tanpa lewat jsonify."""
+    return app.response_class(payload, mimetype='application/json')
+
+def with_change_seq(response, seq):
+    response.headers['X-Change-Seq'] = str(seq)
+    return response
+
+def compact_change_journal(retain_days=None):
+    """Buang entri journal yang sudah digantikan entri lebih baru untuk row yang sama,
+    lalu buang entri yang lebih tua dari retensi. Client dengan seq di bawah batas itu harus full reload."""
+    if retain_days is None:
+        retain_days = app.config['CHANGE_JOURNAL_RETAIN_DAYS']
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        DELETE FROM change_journal
+        WHERE seq NOT IN (SELECT MAX(seq) FROM change_journal GROUP BY table_name, row_id)
+    ''')
+    deduplicated = cursor.rowcount
+
+    cursor.execute(
+        "SELECT MAX(seq) as seq FROM change_journal WHERE changed_at < datetime('now', ?)",
+        (f'-{int(retain_days)} days',)
+    )
+    floor = cursor.fetchone()['seq']
+    expired = 0
+    if floor:
+        cursor.execute('DELETE FROM change_journal WHERE seq <= ?', (floor,))
+        expired = cursor.rowcount
+        cursor.execute(
+            "INSERT INTO sync_state (key, value) VALUES ('journal_floor', ?) ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (floor,)
+        )
+
+    conn.commit()
+    conn.close()
+    return deduplicated + expired
+
+@app.template_global()
+def vendor_url(filename):
+    # File lokal di static/vendor kalau sudah di-download (python vendor_assets.py / build), selain itu CDN
+    if os.path.exists(os.path.join(app.static_folder, 'vendor', filename)):
+        return f'/static/vendor/{filename}'
+    return vendor_assets.VENDOR_ASSETS[filename][0]
+
+def warn_missing_vendor_assets():
+    missing = vendor_assets.missing_assets()
+    if missing:
+        app.logger.warning(
+            'Vendor assets missing or not verified (%s): the UI needs network to load them from the CDN. '
+            'Run python vendor_assets.py', ', '.join(missing)
+        )
+
+@app.route('/static/uploads/<path:filename>')
+def serve_upload(filename):
+    # Attachment ada di BASE_DIR, bukan di folder static bawaan bundle PyInstaller
+    return send_from_directory(UPLOAD_DIR, filename)
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    conn = get_db()
+    include_archived = include_archived_requested()
+    if not include_archived:
+        with repository.read_connection(current_workspace().database) as conn:
+            seq = get_change_seq(conn)
+            payload = repository.fetch_json(conn, repository.TASKS)
+        return with_change_seq(json_response(payload), seq)
+
+    conn = get_db(with_archive=True)
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM tasks ORDER BY created_at DESC')
+    columns = ', '.join(repository.TASKS.fields)
+    cursor.execute(f'''
+        SELECT {columns}, 0 as archived FROM main.tasks
+        UNION ALL
+        SELECT {columns}, 1 as archived FROM archive.tasks
+        ORDER BY created_at DESC
+    ''')
     tasks = [dict(row) for row in cursor.fetchall()]
     conn.close()
+    # Journal hanya mencatat tabel aktif, jadi list gabungan tidak bisa di-delta sync
     return jsonify(tasks)
 
 @app.route('/api/projects', methods=['GET'])
 def get_projects():
-    conn = get_db()
+    include_archived = include_archived_requested()
+    conn = get_db(with_archive=include_archived)
     cursor = conn.cursor()
-    cursor.execute('SELECT DISTINCT project FROM tasks WHERE project IS NOT NULL AND project != "" ORDER BY project')
+    if include_archived:
+        cursor.execute('''
+            SELECT project FROM main.tasks WHERE project IS NOT NULL AND project != ""
+            UNION
+            SELECT project FROM archive.tasks WHERE project IS NOT NULL AND project != ""
+            ORDER BY project
+        ''')
+    else:
+        cursor.execute('SELECT DISTINCT project FROM tasks WHERE project IS NOT NULL AND project != "" ORDER BY project')
     projects = [row['project'] for row in cursor.fetchall()]
     conn.close()
     return jsonify(projects)
@@ -217,13 +649,14 @@ def create_task():
 
     conn.commit()
     task_id = cursor.lastrowid
+    refresh_task_reminder(cursor, task_id)
     conn.close()
     return jsonify({'id': task_id, 'message': 'Task created'}), 201
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
     data = request.json
-    conn = get_db()
+    conn = get_task_db(task_id)
     cursor = conn.cursor()
 
     # Update task including created_at
@@ -241,22 +674,126 @@ def update_task(task_id):
         cursor.execute('UPDATE tasks SET completed_at=CURRENT_TIMESTAMP WHERE id=? AND completed_at IS NULL', (task_id,))
 
     conn.commit()
+    refresh_task_reminder(cursor, task_id)
     conn.close()
     return jsonify({'message': 'Task updated'})
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    conn = get_db()
+    conn = get_task_db(task_id)
     cursor = conn.cursor()
     cursor.execute('DELETE FROM time_logs WHERE task_id=?', (task_id,))
     cursor.execute('DELETE FROM tasks WHERE id=?', (task_id,))
     conn.commit()
+    refresh_task_reminder(cursor, task_id)
     conn.close()
     return jsonify({'message': 'Task deleted'})
 
+def parse_date_arg(name, default=None):
+    value = request.args.get(name)
+    if not value:
+        return default
+    return date.fromisoformat(value)
+
+def query_due_tasks(cursor, start=None, end=None, include_done=False):
+    """Task dengan start <= due_date < end (tanggal ISO), diurutkan per due date.
+
+    Kondisi hanya memakai kolom idx_tasks_due, jadi dijawab dengan range scan di index.
+    """
+    # due_date > '' juga membuang string kosong, yang kalau tidak ikut terhitung "sebelum" semua tanggal
+    conditions = ["due_date > ''"]
+    params = []
+    if start:
+        conditions.append('due_date >= ?')
+        params.append(start.isoformat())
+    if end:
+        conditions.append('due_date < ?')
+        params.append(end.isoformat())
+    if not include_done:
+        conditions.append("status != 'done'")
+    columns = ', '.join(repository.TASKS.fields)
+    cursor.execute(f"SELECT {columns} FROM tasks WHERE {' AND '.join(conditions)} ORDER BY due_date", params)
+    return [dict(row) for row in cursor.fetchall()]
+
+@app.route('/api/tasks/overdue', methods=['GET'])
+def get_overdue_tasks():
+    try:
+        today = parse_date_arg('today', date.today())
+    except ValueError:
+        return jsonify({'message': 'Invalid date, expected YYYY-MM-DD'}), 400
+    conn = get_db()
+    tasks = query_due_tasks(conn.cursor(), end=today)
+    conn.close()
+    return jsonify(tasks)
+
+@app.route('/api/tasks/due-today', methods=['GET'])
+def get_tasks_due_today():
+    try:
+        today = parse_date_arg('today', date.today())
+    except ValueError:
+        return jsonify({'message': 'Invalid date, expected YYYY-MM-DD'}), 400
+    conn = get_db()
+    tasks = query_due_tasks(conn.cursor(), today, today + timedelta(days=1),
+                            include_done=request.args.get('include_done') == '1')
+    conn.close()
+    return jsonify(tasks)
+
+@app.route('/api/tasks/due', methods=['GET'])
+def get_tasks_due_in_range():
+    """Task dengan due date di antara `from` dan `to` (inklusif, YYYY-MM-DD). Keduanya opsional."""
+    try:
+        start = parse_date_arg('from')
+        end = parse_date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date, expected YYYY-MM-DD'}), 400
+    if start and end and start > end:
+        return jsonify({'message': '`from` must not be after `to`'}), 400
+    conn = get_db()
+    tasks = query_due_tasks(conn.cursor(), start, end + timedelta(days=1) if end else None,
+                            include_done=request.args.get('include_done') == '1')
+    conn.close()
+    return jsonify(tasks)
+
+def load_upcoming_deadlines():
+    """(id, title, due_date, status) task yang belum done dengan due date hari ini atau sesudahnya."""
+    conn = get_db()
+    tasks = query_due_tasks(conn.cursor(), start=date.today())
+    conn.close()
+    return [(task['id'], task['title'], task['due_date'], task['status']) for task in tasks]
+
+def start_reminder_scheduler():
+    """Reminder scheduler untuk workspace aktif."""
+    return reminders.start_scheduler(current_workspace().database, load_upcoming_deadlines, app.config['REMINDER_LEAD_HOURS'])
+
+def start_reminder_schedulers():
+    for workspace in list_workspaces():
+        with workspaces.use(workspace):
+            start_reminder_scheduler()
+
+def refresh_task_reminder(cursor, task_id):
+    """Jadwalkan ulang reminder task setelah berubah, kalau scheduler sedang jalan."""
+    scheduler = reminders.loaded_scheduler(current_workspace().database)
+    if scheduler is None:
+        return
+    cursor.execute('SELECT title, due_date, status FROM tasks WHERE id=?', (task_id,))
+    task = cursor.fetchone()
+    if task:
+        scheduler.update(task_id, task['title'], task['due_date'], task['status'])
+    else:
+        scheduler.cancel(task_id)
+
+@app.route('/api/reminders', methods=['GET'])
+def get_reminders():
+    """Reminder yang sudah terkirim setelah `after` (seq). Dibaca dari memori scheduler, bukan dari tabel."""
+    scheduler = reminders.loaded_scheduler(current_workspace().database)
+    if scheduler is None:
+        return jsonify({'seq': 0, 'reminders': []})
+    after = request.args.get('after', 0, type=int)
+    return jsonify({'seq': scheduler.last_fired_seq, 'reminders': scheduler.fired_since(after)})
+
 @app.route('/api/tasks/<int:task_id>/start-timer', methods=['POST'])
 def start_timer(task_id):
-    conn = get_db()
+    conn = get_task_db(task_id)
     cursor = conn.cursor()
 
     # Stop all other active timers first
@@ -328,26 +865,52 @@ def stop_timer(task_id):
     conn.close()
     return jsonify({'message': 'No active timer found'}), 404
 
+def dashboard_totals(conn):
+    """Jumlah task per status, total waktu, completed today dan task bertimer, termasuk rollup task yang diarsipkan.
+
+    Satu scan tabel tasks; hanya memakai indeks kolom, jadi jalan di koneksi biasa maupun koneksi pool (tuple).
+    """
+    totals = {'status_counts': {}, 'total_time': 0, 'completed_today': 0, 'timed_total': 0, 'timed_count': 0}
+    rows = conn.execute('''
+        SELECT status,
+               COUNT(*),
+               COALESCE(SUM(time_spent), 0),
+               COALESCE(SUM(CASE WHEN time_spent > 0 THEN time_spent ELSE 0 END), 0),
+               SUM(CASE WHEN time_spent > 0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN DATE(completed_at) = DATE('now') THEN 1 ELSE 0 END)
+        FROM tasks
+        GROUP BY status
+    ''').fetchall()
+    for status, count, time_spent, timed_total, timed_count, completed_today in rows:
+        totals['status_counts'][status] = count
+        totals['total_time'] += time_spent
+        totals['timed_total'] += timed_total
+        totals['timed_count'] += timed_count
+        totals['completed_today'] += completed_today
+
+    # Rollup task yang sudah diarsipkan, supaya total tetap benar
+    rollups = conn.execute('SELECT status, task_count, time_spent_total, timed_task_count FROM archived_task_rollups').fetchall()
+    for status, task_count, time_spent_total, timed_task_count in rollups:
+        if task_count:
+            totals['status_counts'][status] = totals['status_counts'].get(status, 0) + task_count
+        totals['total_time'] += time_spent_total
+        totals['timed_total'] += time_spent_total
+        totals['timed_count'] += timed_task_count
+    return totals
+
+def average_time(totals):
+    return totals['timed_total'] / totals['timed_count'] if totals['timed_count'] else 0
+
 @app.route('/api/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
     conn = get_db()
     cursor = conn.cursor()
 
-    # Get task counts by status
-    cursor.execute('SELECT status, COUNT(*) as count FROM tasks GROUP BY status')
-    status_counts = {row['status']: row['count'] for row in cursor.fetchall()}
-
-    # Get total time spent
-    cursor.execute('SELECT COALESCE(SUM(time_spent), 0) as total_time FROM tasks')
-    total_time = cursor.fetchone()['total_time']
-
-    # Get tasks completed today
-    cursor.execute('SELECT COUNT(*) as count FROM tasks WHERE DATE(completed_at) = DATE("now")')
-    completed_today = cursor.fetchone()['count']
-
-    # Get average time per task
-    cursor.execute('SELECT AVG(time_spent) as avg_time FROM tasks WHERE time_spent > 0')
-    avg_time = cursor.fetchone()['avg_time'] or 0
+    totals = dashboard_totals(conn)
+    status_counts = totals['status_counts']
+    total_time = totals['total_time']
+    completed_today = totals['completed_today']
+    avg_time = average_time(totals)
 
     # Get tasks completed per day grouped by priority (last 7 days)
     cursor.execute('''
@@ -387,25 +950,65 @@ def get_dashboard_stats():
         'daily_created': [dict(row) for row in daily_created]
     })
 
+@app.route('/api/workspaces', methods=['GET'])
+def get_workspaces():
+    return jsonify({
+        'current': current_workspace().name,
+        'workspaces': [
+            {'name': workspace.name, 'db_size': os.path.getsize(workspace.database) if os.path.exists(workspace.database) else 0}
+            for workspace in list_workspaces()
+        ],
+    })
+
+@app.route('/api/workspaces', methods=['POST'])
+def create_workspace():
+    name = ((request.json or {}).get('name') or '').strip().lower()
+    if not workspaces.is_valid_name(name):
+        return jsonify({'message': 'Workspace name may only contain lowercase letters, digits, "-" and "_"'}), 400
+    workspace = get_workspace(name)
+    if workspace_exists(workspace):
+        return jsonify({'message': 'Workspace already exists'}), 409
+
+    workspaces.ensure_initialized(workspace, init_workspace)
+    return jsonify({'name': name, 'message': 'Workspace created'}), 201
+
+@app.route('/api/workspaces/dashboard', methods=['GET'])
+def get_workspaces_dashboard():
+    """Ringkasan dashboard semua workspace. Query per workspace jalan paralel di koneksi baca masing-masing."""
+    combined = {'status_counts': {}, 'total_time': 0, 'completed_today': 0, 'timed_total': 0, 'timed_count': 0}
+    results = []
+    for workspace, totals, error in workspaces.fan_out(list_workspaces(), dashboard_totals):
+        if error:
+            results.append({'name': workspace.name, 'error': error})
+            continue
+        for status, count in totals['status_counts'].items():
+            combined['status_counts'][status] = combined['status_counts'].get(status, 0) + count
+        for key in ('total_time', 'completed_today', 'timed_total', 'timed_count'):
+            combined[key] += totals[key]
+        results.append({
+            'name': workspace.name,
+            'status_counts': totals['status_counts'],
+            'total_time': totals['total_time'],
+            'completed_today': totals['completed_today'],
+            'average_time': average_time(totals),
+        })
+
+    return jsonify({
+        'workspaces': results,
+        'total': {
+            'status_counts': combined['status_counts'],
+            'total_time': combined['total_time'],
+            'completed_today': combined['completed_today'],
+            'average_time': average_time(combined),
+        },
+    })
+
 @app.route('/api/credentials', methods=['GET'])
 def get_credentials():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM server_credentials ORDER BY created_at DESC')
-    credentials = []
-    for row in cursor.fetchall():
-        cred = dict(row)
-        # Parse tags from JSON string
-        if cred.get('tags'):
-            try:
-                cred['tags'] = json.loads(cred['tags'])
-            except:
-                cred['tags'] = []
-        else:
-            cred['tags'] = []
-        credentials.append(cred)
-    conn.close()
-    return jsonify(credentials)
+    with repository.read_connection(current_workspace().database) as conn:
+        seq = get_change_seq(conn)
+        payload = repository.fetch_json(conn, repository.CREDENTIALS)
+    return with_change_seq(json_response(payload), seq)
 
 @app.route('/api/credentials', methods=['POST'])
 def create_credential():
@@ -472,29 +1075,140 @@ def get_all_credential_tags():
     conn.close()
     return jsonify(sorted(list(all_tags)))
 
-@app.route('/api/tasks/active-timers', methods=['GET'])
-def get_active_timers():
+@app.route('/api/archive', methods=['POST'])
+def run_archive():
+    data = request.get_json(silent=True) or {}
+    before = data.get('before')
+    try:
+        days = int(data['days']) if data.get('days') is not None else None
+        batch_size = int(data['batch_size']) if data.get('batch_size') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'message': 'days and batch_size must be integers'}), 400
+    if (days is not None and days < 0) or (batch_size is not None and batch_size < 1):
+        return jsonify({'message': 'days must be >= 0 and batch_size >= 1'}), 400
+    if before is not None:
+        # Dibandingkan sebagai teks dengan completed_at, jadi harus timestamp valid dalam format yang sama
+        try:
+            before = datetime.fromisoformat(before)
+        except (TypeError, ValueError):
+            return jsonify({'message': 'before must be an ISO 8601 timestamp'}), 400
+        if before.tzinfo is not None:
+            # completed_at disimpan dalam UTC (CURRENT_TIMESTAMP)
+            before = before.astimezone(timezone.utc).replace(tzinfo=None)
+        before = before.strftime('%Y-%m-%d %H:%M:%S')
+
+    if before is None and days is not None:
+        conn = get_db()
+        before = conn.execute("SELECT datetime('now', ?)", (f'-{days} days',)).fetchone()[0]
+        conn.close()
+
+    archived = archive_completed_tasks(before=before, batch_size=batch_size)
+    return jsonify({'archived': archived, 'message': 'Archive completed'})
+
+# Projection per tabel sync, sama dengan list endpoint-nya supaya row hasil delta bisa langsung di-merge
+SYNC_PROJECTIONS = {
+    'tasks': repository.TASKS,
+    'time_logs': repository.TIME_LOGS,
+    'notes': repository.NOTES,
+    'folders': repository.FOLDERS,
+    'credentials': repository.CREDENTIALS,
+}
+
+@app.route('/api/sync', methods=['GET'])
+def sync_changes():
+    since = request.args.get('since', 0, type=int)
+    names = request.args.get('tables')
+    names = names.split(',') if names else list(SYNC_TABLES)
+    unknown = [name for name in names if name not in SYNC_TABLES]
+    if unknown:
+        return jsonify({'message': f"Unknown table: {', '.join(unknown)}"}), 400
+
+    with repository.read_connection(current_workspace().database) as conn:
+        seq = get_change_seq(conn)
+
+        # Entri sebelum floor sudah di-compact, client harus full reload
+        floor = conn.execute("SELECT value FROM sync_state WHERE key='journal_floor'").fetchone()
+        if floor and since < floor[0]:
+            return jsonify({'seq': seq, 'reset': True, 'changes': {}})
+
+        changes = {}
+        for name in names:
+            row_ids = [row[0] for row in conn.execute(
+                'SELECT DISTINCT row_id FROM change_journal WHERE table_name=? AND seq > ? AND seq <= ?',
+                (SYNC_TABLES[name], since, seq)
+            )]
+            projection = SYNC_PROJECTIONS[name]
+            upserted = repository.to_json_objects(projection, repository.select(conn, projection, row_ids))
+            existing = {row['id'] for row in upserted}
+            changes[name] = {
+                'upserted': upserted,
+                'deleted': [row_id for row_id in row_ids if row_id not in existing]
+            }
+
+    return json_response(json.dumps({'seq': seq, 'reset': False, 'changes': changes}, separators=(',', ':')))
+
+@app.route('/api/maintenance/report', methods=['GET'])
+def get_maintenance_report():
     conn = get_db()
     cursor = conn.cursor()
 
-    # Get all tasks with active timers
+    page_size = cursor.execute('PRAGMA page_size').fetchone()[0]
+    page_count = cursor.execute('PRAGMA page_count').fetchone()[0]
+    freelist_count = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+
+    # Waktu yang dihabiskan tiap job
     cursor.execute('''
-        SELECT t.id, t.time_spent, tl.start_time,
-               (strftime('%s', 'now') - strftime('%s', tl.start_time)) as elapsed
-        FROM tasks t
-        JOIN time_logs tl ON t.id = tl.task_id
-        WHERE tl.end_time IS NULL
-        ORDER BY tl.start_time DESC
+        SELECT job,
+               COUNT(*) as runs,
+               COALESCE(SUM(duration_ms), 0) as total_ms,
+               AVG(duration_ms) as average_ms,
+               MAX(started_at) as last_run
+        FROM maintenance_log
+        GROUP BY job
+        ORDER BY job
     ''')
+    jobs = [dict(row) for row in cursor.fetchall()]
+    for job in jobs:
+        cursor.execute(
+            'SELECT result FROM maintenance_log WHERE job=? ORDER BY id DESC LIMIT 1',
+            (job['job'],)
+        )
+        job['last_result'] = cursor.fetchone()['result']
+
+    # Ukuran database per hari (30 hari terakhir)
+    cursor.execute('''
+        SELECT DATE(started_at) as date,
+               MAX(db_size) as db_size,
+               MAX(freelist_count) as freelist_count
+        FROM maintenance_log
+        WHERE DATE(started_at) >= DATE('now', '-29 days')
+        GROUP BY DATE(started_at)
+        ORDER BY DATE(started_at)
+    ''')
+    size_trend = [dict(row) for row in cursor.fetchall()]
 
-    active_timers = [dict(row) for row in cursor.fetchall()]
     conn.close()
-    return jsonify(active_timers)
+    return jsonify({
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'db_size': page_size * page_count,
+        'fragmentation': freelist_count / page_count if page_count else 0,
+        'jobs': jobs,
+        'size_trend': size_trend
+    })
+
+@app.route('/api/tasks/active-timers', methods=['GET'])
+def get_active_timers():
+    # Get all tasks with active timers
+    with repository.read_connection(current_workspace().database) as conn:
+        payload = repository.fetch_json(conn, repository.ACTIVE_TIMERS)
+    return json_response(payload)
 
 @app.route('/api/tasks/<int:task_id>/time-spent', methods=['PUT'])
 def update_time_spent(task_id):
     data = request.json
-    conn = get_db()
+    conn = get_task_db(task_id)
     cursor = conn.cursor()
 
     time_spent = data.get('time_spent', 0)
@@ -507,12 +1221,10 @@ def update_time_spent(task_id):
 # Folder API Endpoints
 @app.route('/api/folders', methods=['GET'])
 def get_folders():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM folders ORDER BY position, name')
-    folders = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(folders)
+    with repository.read_connection(current_workspace().database) as conn:
+        seq = get_change_seq(conn)
+        payload = repository.fetch_json(conn, repository.FOLDERS)
+    return with_change_seq(json_response(payload), seq)
 
 @app.route('/api/folders', methods=['POST'])
 def create_folder():
@@ -613,28 +1325,11 @@ def update_folder_positions():
 # Notes API Endpoints
 @app.route('/api/notes', methods=['GET'])
 def get_notes():
-    conn = get_db()
-    cursor = conn.cursor()
-
-    # Get all notes with their tags and attachment count
-    cursor.execute('''
-        SELECT n.*,
-               GROUP_CONCAT(DISTINCT nt.tag) as tags,
-               COUNT(DISTINCT na.id) as attachment_count
-        FROM notes n
-        LEFT JOIN note_tags nt ON n.id = nt.note_id
-        LEFT JOIN note_attachments na ON n.id = na.id
-        GROUP BY n.id
-        ORDER BY n.updated_at DESC
-    ''')
-    notes = []
-    for row in cursor.fetchall():
-        note = dict(row)
-        note['tags'] = note['tags'].split(',') if note['tags'] else []
-        notes.append(note)
-
-    conn.close()
-    return jsonify(notes)
+    # Notes with their tags and attachment count
+    with repository.read_connection(current_workspace().database) as conn:
+        seq = get_change_seq(conn)
+        payload = repository.fetch_json(conn, repository.NOTES)
+    return with_change_seq(json_response(payload), seq)
 
 @app.route('/api/notes/<int:note_id>', methods=['GET'])
 def get_note(note_id):
@@ -668,6 +1363,10 @@ def get_note(note_id):
     ''', (note_id,))
     note['linked_notes'] = [dict(row) for row in cursor.fetchall()]
 
+    # Base untuk PATCH
+    note['version'] = get_note_version(cursor, note_id)
+    note['content_hash'] = content_hash(note['content'])
+
     conn.close()
     return jsonify(note)
 
@@ -707,6 +1406,7 @@ def create_note():
             )
 
     conn.commit()
+    refresh_related_index(cursor, note_id)
     conn.close()
     return jsonify({'id': note_id, 'message': 'Note created'}), 201
 
@@ -752,9 +1452,253 @@ def update_note(note_id):
             )
 
     conn.commit()
+    refresh_related_index(cursor, note_id)
     conn.close()
     return jsonify({'message': 'Note updated', 'version': new_version})
 
+def content_hash(content):
+    return hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+
+def get_note_version(cursor, note_id):
+    cursor.execute('SELECT COALESCE(MAX(version_number), 0) as version FROM note_versions WHERE note_id=?', (note_id,))
+    return cursor.fetchone()['version']
+
+def apply_text_diff(text, ops):
+    """Terapkan operasi {pos, delete, insert} terhadap teks base.
+
+    Posisi dihitung dalam UTF-16 code unit seperti string JavaScript, dan tidak boleh overlap.
+    """
+    units = text.encode('utf-16-le')
+    parts = []
+    last = 0
+    for op in sorted(ops, key=lambda op: op['pos']):
+        start = int(op['pos']) * 2
+        end = start + int(op.get('delete', 0)) * 2
+        if start < last or end > len(units) or end < start:
+            raise ValueError('Invalid diff')
+        parts.append(units[last:start])
+        parts.append(op.get('insert', '').encode('utf-16-le'))
+        last = end
+    parts.append(units[last:])
+    return b''.join(parts).decode('utf-16-le')
+
+def normalize_id(value):
+    return int(value) if value not in (None, '') else None
+
+def parse_change_set(value, convert):
+    """`{add: [...], remove: [...]}` dari PATCH jadi (add, remove) yang sudah di-convert; ValueError kalau bentuknya salah."""
+    if value is None:
+        return [], []
+    if not isinstance(value, dict) or not set(value) <= {'add', 'remove'}:
+        raise ValueError('expected {add: [...], remove: [...]}')
+    changes = []
+    for key in ('add', 'remove'):
+        items = value.get(key) or []
+        if not isinstance(items, list):
+            raise ValueError(f'{key} must be a list')
+        changes.append([convert(item) for item in items])
+    return changes[0], changes[1]
+
+def tag_value(value):
+    if not isinstance(value, str) or not value:
+        raise ValueError('tags must be non-empty strings')
+    return value
+
+def note_id_value(value):
+    if isinstance(value, bool):
+        raise ValueError('note ids must be integers')
+    return int(value)
+
+@app.route('/api/notes/<int:note_id>', methods=['PATCH'])
+def patch_note(note_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'message': 'Expected a JSON object'}), 400
+    if 'content' in data and not isinstance(data['content'], str):
+        return jsonify({'message': 'content must be a string'}), 400
+    if 'title' in data and not (isinstance(data['title'], str) and data['title']):
+        return jsonify({'message': 'title must be a non-empty string'}), 400
+    try:
+        tags_add, tags_remove = parse_change_set(data.get('tags'), tag_value)
+        links_add, links_remove = parse_change_set(data.get('linked_note_ids'), note_id_value)
+        ids = {key: normalize_id(data[key]) for key in ('task_id', 'folder_id') if key in data}
+    except (ValueError, TypeError) as e:
+        return jsonify({'message': f'Invalid tags, linked_note_ids, task_id or folder_id: {e}'}), 400
+
+    # Save digabung ke versi terakhir (NOTE_VERSION_COALESCE_SECONDS) tanpa menaikkan version,
+    # jadi perubahan konten juga wajib base_hash supaya diff dari client yang basi tetap terdeteksi
+    has_content = 'content_diff' in data or 'content' in data
+    if has_content and ('base_version' not in data or 'base_hash' not in data):
+        return jsonify({'message': 'base_version and base_hash are required'}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        # Cek konflik dan write dalam satu transaksi, supaya dua save bersamaan tidak sama-sama lolos
+        cursor.execute('BEGIN IMMEDIATE')
+
+        cursor.execute('SELECT * FROM notes WHERE id=?', (note_id,))
+        note = cursor.fetchone()
+        if not note:
+            return jsonify({'message': 'Note not found'}), 404
+
+        current_version = get_note_version(cursor, note_id)
+        current_hash = content_hash(note['content'])
+
+        # Conflict detection: base yang dipakai client harus masih versi (dan konten) terbaru
+        if 'base_version' in data and (data['base_version'] != current_version or
+                                       data.get('base_hash', current_hash) != current_hash):
+            return jsonify({
+                'message': 'Note was modified since the base version',
+                'version': current_version,
+                'content_hash': current_hash,
+                'title': note['title'],
+                'content': note['content']
+            }), 409
+
+        fields = {}
+        if 'content_diff' in data:
+            try:
+                content = apply_text_diff(note['content'] or '', data['content_diff'])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                return jsonify({'message': 'Invalid content diff'}), 400
+        else:
+            content = data.get('content', note['content'])
+        if content != note['content']:
+            fields['content'] = content
+        if 'title' in data and data['title'] != note['title']:
+            fields['title'] = data['title']
+        for key, value in ids.items():
+            if value != note[key]:
+                fields[key] = value
+
+        # Tags dan links: hanya tambah/hapus yang berubah
+        cursor.execute('SELECT tag FROM note_tags WHERE note_id=?', (note_id,))
+        current_tags = {row['tag'] for row in cursor.fetchall()}
+        tags_added = [tag for tag in dict.fromkeys(tags_add) if tag not in current_tags]
+        tags_removed = [tag for tag in set(tags_remove) if tag in current_tags]
+
+        cursor.execute('SELECT target_note_id FROM note_links WHERE source_note_id=?', (note_id,))
+        current_links = {row['target_note_id'] for row in cursor.fetchall()}
+        links_added = [target for target in dict.fromkeys(links_add) if target not in current_links]
+        links_removed = [target for target in set(links_remove) if target in current_links]
+
+        if not (fields or tags_added or tags_removed or links_added or links_removed):
+            return jsonify({'message': 'No changes', 'version': current_version, 'content_hash': current_hash})
+
+        # updated_at selalu disentuh supaya perubahan tags/links ikut tercatat di change journal
+        assignments = ''.join(f'{key}=?, ' for key in fields)
+        cursor.execute(
+            f'UPDATE notes SET {assignments}updated_at=CURRENT_TIMESTAMP WHERE id=?',
+            (*fields.values(), note_id)
+        )
+
+        for tag in tags_added:
+            cursor.execute('INSERT INTO note_tags (note_id, tag) VALUES (?, ?)', (note_id, tag))
+        for tag in tags_removed:
+            cursor.execute('DELETE FROM note_tags WHERE note_id=? AND tag=?', (note_id, tag))
+        for target_id in links_added:
+            cursor.execute('INSERT INTO note_links (source_note_id, target_note_id) VALUES (?, ?)', (note_id, target_id))
+        for target_id in links_removed:
+            cursor.execute('DELETE FROM note_links WHERE source_note_id=? AND target_note_id=?', (note_id, target_id))
+
+        new_version = current_version
+        if 'title' in fields or 'content' in fields:
+            title = fields.get('title', note['title'])
+            content = fields.get('content', note['content'])
+
+            # Save beruntun digabung ke versi terakhir (kecuali versi awal saat note dibuat)
+            cursor.execute(
+                "SELECT id FROM note_versions WHERE note_id=? AND version_number=? AND version_number > 1 AND created_at >= datetime('now', ?)",
+                (note_id, current_version, f"-{int(app.config['NOTE_VERSION_COALESCE_SECONDS'])} seconds")
+            )
+            recent = cursor.fetchone()
+            if recent:
+                cursor.execute('UPDATE note_versions SET title=?, content=? WHERE id=?', (title, content, recent['id']))
+            else:
+                new_version = current_version + 1
+                cursor.execute(
+                    'INSERT INTO note_versions (note_id, title, content, version_number) VALUES (?, ?, ?, ?)',
+                    (note_id, title, content, new_version)
+                )
+
+        conn.commit()
+        refresh_related_index(cursor, note_id)
+        return jsonify({
+            'message': 'Note updated',
+            'version': new_version,
+            'content_hash': content_hash(fields.get('content', note['content']))
+        })
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        return jsonify({'message': f'Invalid note update: {e}'}), 400
+    except Exception:
+        # Lepas write lock BEGIN IMMEDIATE, kalau tidak semua write berikutnya gagal 'database is locked'
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def load_note_stamps():
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, updated_at FROM notes')
+    stamps = {row['id']: row['updated_at'] for row in cursor.fetchall()}
+    conn.close()
+    return stamps
+
+def fetch_notes_for_index(note_ids):
+    conn = get_db()
+    cursor = conn.cursor()
+    for i in range(0, len(note_ids), 500):
+        batch = note_ids[i:i + 500]
+        cursor.execute(
+            f"SELECT id, title, content, updated_at FROM notes WHERE id IN ({', '.join('?' * len(batch))})",
+            batch
+        )
+        for row in cursor.fetchall():
+            yield row['id'], row['title'], row['content'], row['updated_at']
+    conn.close()
+
+def get_related_index():
+    return related_notes.get_index(current_workspace().related_index_path, load_note_stamps, fetch_notes_for_index)
+
+def refresh_related_index(cursor, note_id):
+    """Update index related notes kalau sudah dimuat. Kalau belum, perubahan ikut tersamakan saat index dimuat."""
+    index = related_notes.loaded_index(current_workspace().related_index_path) if related_notes.available else None
+    if index is None:
+        return
+    cursor.execute('SELECT title, content, updated_at FROM notes WHERE id=?', (note_id,))
+    note = cursor.fetchone()
+    if note:
+        index.update(note_id, note['title'], note['content'], note['updated_at'])
+    else:
+        index.remove(note_id)
+
+@app.route('/api/notes/<int:note_id>/related', methods=['GET'])
+def get_related_notes(note_id):
+    if not related_notes.available:
+        return jsonify({'message': 'Related notes not available'}), 501
+
+    k = min(max(request.args.get('k', 10, type=int), 1), 100)
+    related = get_related_index().related(note_id, k)
+    if not related:
+        return jsonify([])
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT id, title FROM notes WHERE id IN ({', '.join('?' * len(related))})",
+        [related_id for related_id, _ in related]
+    )
+    titles = {row['id']: row['title'] for row in cursor.fetchall()}
+    conn.close()
+
+    return jsonify([
+        {'id': related_id, 'title': titles[related_id], 'score': round(score, 4)}
+        for related_id, score in related if related_id in titles
+    ])
+
 @app.route('/api/notes/<int:note_id>', methods=['DELETE'])
 def delete_note(note_id):
     conn = get_db()
@@ -762,11 +1706,77 @@ def delete_note(note_id):
 
     # Delete note (cascade will handle tags, versions, attachments, links)
     cursor.execute('DELETE FROM notes WHERE id=?', (note_id,))
+    cursor.execute('DELETE FROM note_render_cache WHERE note_id=?', (note_id,))
 
     conn.commit()
+    refresh_related_index(cursor, note_id)
     conn.close()
     return jsonify({'message': 'Note deleted'})
 
+# Naikkan kalau output render_markdown berubah, supaya cache dan ETag lama tidak dipakai lagi
+RENDER_VERSION = 'markdown-it-gfm-1'
+
+# Tag/atribut tambahan di atas default nh3: checkbox task list dan class bahasa untuk highlight.js
+RENDER_ALLOWED_TAGS = (nh3.ALLOWED_TAGS | {'input'}) if MarkdownIt else set()
+RENDER_ALLOWED_ATTRIBUTES = {
+    **(nh3.ALLOWED_ATTRIBUTES if MarkdownIt else {}),
+    'code': {'class'},
+    'li': {'class'},
+    'input': {'type', 'checked', 'disabled'},
+    'h1': {'id'}, 'h2': {'id'}, 'h3': {'id'}, 'h4': {'id'}, 'h5': {'id'}, 'h6': {'id'},
+}
+
+def create_markdown_renderer():
+    # Sama dengan marked.js di client (gfm: true, breaks: true): tabel, ~~strike~~, autolink URL, task list, newline jadi <br>
+    md = MarkdownIt('gfm-like', {'breaks': True}).use(tasklists_plugin)
+    # marked menulis strikethrough sebagai <del>, markdown-it sebagai <s>
+    md.add_render_rule('s_open', lambda self, tokens, idx, options, env: '<del>')
+    md.add_render_rule('s_close', lambda self, tokens, idx, options, env: '</del>')
+    return md
+
+markdown_renderer = create_markdown_renderer() if MarkdownIt else None
+
+def render_markdown(content):
+    html = markdown_renderer.render(content)
+    return nh3.clean(html, tags=RENDER_ALLOWED_TAGS, attributes=RENDER_ALLOWED_ATTRIBUTES)
+
+@app.route('/api/notes/<int:note_id>/render', methods=['GET'])
+def get_rendered_note(note_id):
+    if MarkdownIt is None:
+        return jsonify({'message': 'Server-side rendering not available'}), 501
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT content FROM notes WHERE id=?', (note_id,))
+    note = cursor.fetchone()
+    if not note:
+        conn.close()
+        return jsonify({'message': 'Note not found'}), 404
+
+    content = note['content'] or 'No content available'
+    rendered_hash = content_hash(f'{RENDER_VERSION}\n{content}')
+    if rendered_hash in request.if_none_match:
+        conn.close()
+        return '', 304
+
+    cursor.execute('SELECT html FROM note_render_cache WHERE note_id=? AND content_hash=?', (note_id, rendered_hash))
+    cached = cursor.fetchone()
+    if cached:
+        html = cached['html']
+    else:
+        html = render_markdown(content)
+        cursor.execute(
+            'INSERT OR REPLACE INTO note_render_cache (note_id, content_hash, html) VALUES (?, ?, ?)',
+            (note_id, rendered_hash, html)
+        )
+        conn.commit()
+
+    conn.close()
+    response = jsonify({'html': html, 'content_hash': rendered_hash})
+    response.set_etag(rendered_hash)
+    return response
+
 @app.route('/api/notes/<int:note_id>/versions', methods=['GET'])
 def get_note_versions(note_id):
     conn = get_db()
@@ -815,6 +1825,7 @@ def restore_note_version(note_id, version_number):
     )
 
     conn.commit()
+    refresh_related_index(cursor, note_id)
     conn.close()
     return jsonify({'message': 'Version restored', 'version': new_version})
 
@@ -839,7 +1850,7 @@ def upload_attachment(note_id):
         return jsonify({'message': 'No file selected'}), 400
 
     # Create uploads directory if it doesn't exist
-    upload_dir = os.path.join('static', 'uploads')
+    upload_dir = current_workspace().upload_dir
     os.makedirs(upload_dir, exist_ok=True)
 
     # Save file
@@ -850,6 +1861,8 @@ def upload_attachment(note_id):
     # Get file info
     file_size = os.path.getsize(filepath)
     file_type = file.content_type
+    # Disimpan relatif ke BASE_DIR, dipakai client sebagai link /static/uploads/...
+    filepath = os.path.relpath(filepath, BASE_DIR)
 
     # Save to database
     conn = get_db()
@@ -883,8 +1896,9 @@ def delete_attachment(note_id, attachment_id):
         return jsonify({'message': 'Attachment not found'}), 404
 
     # Delete file from filesystem
-    if os.path.exists(attachment['filepath']):
-        os.remove(attachment['filepath'])
+    filepath = os.path.join(BASE_DIR, attachment['filepath'])
+    if os.path.exists(filepath):
+        os.remove(filepath)
 
     # Delete from database
     cursor.execute('DELETE FROM note_attachments WHERE id=?', (attachment_id,))
@@ -894,5 +1908,7 @@ def delete_attachment(note_id, attachment_id):
     return jsonify({'message': 'Attachment deleted'})
 
 if __name__ == '__main__':
-    init_db()
+    warn_missing_vendor_assets()
+    init_workspaces()
+    start_reminder_schedulers()
     app.run(debug=True, port=5000)
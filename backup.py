@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+import app as tracker
+import workspaces
+
+MANIFEST_NAME = 'manifest.json'
+
+# Semua fungsi di sini bekerja pada workspace aktif (tracker.current_workspace()), snapshot disimpan per workspace
+
+def get_backup_dir():
+    return os.path.join(os.path.dirname(tracker.current_workspace().database), 'backups')
+
+def list_snapshots():
+    """Snapshot lengkap (punya manifest), dari yang paling lama ke yang paling baru."""
+    backup_dir = get_backup_dir()
+    if not os.path.isdir(backup_dir):
+        return []
+    names = sorted(
+        name for name in os.listdir(backup_dir)
+        if name.startswith('snapshot-') and os.path.exists(os.path.join(backup_dir, name, MANIFEST_NAME))
+    )
+    return [os.path.join(backup_dir, name) for name in names]
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(snapshot_path):
+    with open(os.path.join(snapshot_path, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+def backup_database(source_path, target_path, pages_per_step=None):
+    """Online backup lewat SQLite backup API.
+
+    Disalin per `pages_per_step` halaman, lock dilepas di antara langkah supaya writer tidak terblokir lama.
+    """
+    pages_per_step = pages_per_step or tracker.app.config['BACKUP_PAGES_PER_STEP']
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages_per_step, sleep=0.005)
+    finally:
+        target.close()
+        source.close()
+
+def backup_uploads(snapshot_path, previous_manifest):
+    """Salin attachment ke snapshot. File yang tidak berubah sejak snapshot sebelumnya di-hard link."""
+    previous_files = previous_manifest.get('uploads', {}) if previous_manifest else {}
+    previous_dir = os.path.join(previous_manifest['path'], 'uploads') if previous_manifest else None
+    target_dir = os.path.join(snapshot_path, 'uploads')
+    os.makedirs(target_dir, exist_ok=True)
+
+    files = {}
+    copied = linked = 0
+    upload_dir = tracker.current_workspace().upload_dir
+    if not os.path.isdir(upload_dir):
+        return files, copied, linked
+
+    for name in sorted(os.listdir(upload_dir)):
+        source = os.path.join(upload_dir, name)
+        if not os.path.isfile(source):
+            continue
+        stat = os.stat(source)
+        previous = previous_files.get(name)
+
+        # Size + mtime sama dianggap tidak berubah, selain itu bandingkan hash
+        if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime:
+            sha256 = previous['sha256']
+        else:
+            sha256 = file_sha256(source)
+
+        target = os.path.join(target_dir, name)
+        previous_copy = os.path.join(previous_dir, name) if previous_dir else None
+        if previous and previous['sha256'] == sha256 and os.path.exists(previous_copy):
+            try:
+                os.link(previous_copy, target)
+            except OSError:
+                # Filesystem tanpa dukungan hard link
+                shutil.copy2(source, target)
+            linked += 1
+        else:
+            shutil.copy2(source, target)
+            copied += 1
+
+        files[name] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256}
+
+    return files, copied, linked
+
+def create_snapshot():
+    snapshots = list_snapshots()
+    previous_manifest = None
+    if snapshots:
+        try:
+            previous_manifest = load_manifest(snapshots[-1])
+            previous_manifest['path'] = snapshots[-1]
+        except (OSError, ValueError):
+            previous_manifest = None
+
+    started = datetime.now()
+    name = started.strftime('snapshot-%Y%m%d-%H%M%S-%f')
+    snapshot_path = os.path.join(get_backup_dir(), name)
+    # Ditulis ke folder sementara dan baru di-rename setelah manifest ada, supaya snapshot
+    # yang gagal di tengah jalan tidak ikut dihitung rotasi atau dipilih sebagai snapshot terbaru
+    temp_path = os.path.join(get_backup_dir(), f'.tmp-{name}')
+    os.makedirs(temp_path)
+    try:
+        write_snapshot(temp_path, started, previous_manifest)
+    except BaseException:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+    os.replace(temp_path, snapshot_path)
+    return snapshot_path
+
+def write_snapshot(snapshot_path, started, previous_manifest):
+    workspace = tracker.current_workspace()
+    databases = {}
+    for source_path in (workspace.database, workspace.archive_database):
+        if not os.path.exists(source_path):
+            continue
+        name = os.path.basename(source_path)
+        target_path = os.path.join(snapshot_path, name)
+        backup_database(source_path, target_path)
+        databases[name] = file_sha256(target_path)
+
+    uploads, copied, linked = backup_uploads(snapshot_path, previous_manifest)
+
+    manifest = {
+        'created_at': started.isoformat(timespec='seconds'),
+        'databases': databases,
+        'uploads': uploads,
+        'uploads_copied': copied,
+        'uploads_linked': linked,
+    }
+    with open(os.path.join(snapshot_path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def rotate_snapshots(keep=None):
+    keep = keep or tracker.app.config['BACKUP_KEEP']
+    snapshots = list_snapshots()
+    removed = snapshots[:-keep] if len(snapshots) > keep else []
+    for snapshot_path in removed:
+        shutil.rmtree(snapshot_path)
+    return removed
+
+def verify_snapshot(snapshot_path):
+    """Cek integrity_check tiap database dan hash tiap attachment terhadap manifest. Mengembalikan list masalah."""
+    try:
+        manifest = load_manifest(snapshot_path)
+    except (OSError, ValueError) as e:
+        return [f'Cannot read manifest: {e}']
+
+    problems = []
+    for name, sha256 in manifest['databases'].items():
+        path = os.path.join(snapshot_path, name)
+        if not os.path.exists(path):
+            problems.append(f'Missing database: {name}')
+            continue
+        if file_sha256(path) != sha256:
+            problems.append(f'Checksum mismatch: {name}')
+        # immutable: snapshot tidak pernah ditulis, jadi tidak perlu lock dan tidak membuat -wal/-shm di folder snapshot
+        conn = sqlite3.connect(f'file:{path}?immutable=1', uri=True)
+        result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        conn.close()
+        if result != 'ok':
+            problems.append(f'Integrity check failed for {name}: {result}')
+
+    for name, info in manifest['uploads'].items():
+        path = os.path.join(snapshot_path, 'uploads', name)
+        if not os.path.exists(path):
+            problems.append(f'Missing upload: {name}')
+        elif file_sha256(path) != info['sha256']:
+            problems.append(f'Checksum mismatch: uploads/{name}')
+
+    return problems
+
+def move_aside_database(path):
+    """Pindahkan database (beserta -wal/-shm) ke `<path>.pre-restore-<timestamp>`. Mengembalikan path baru."""
+    moved_path = f"{path}.pre-restore-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+    for suffix in ('-wal', '-shm', ''):
+        if os.path.exists(path + suffix):
+            os.replace(path + suffix, moved_path + suffix)
+    return moved_path
+
+def restore_snapshot(snapshot_path):
+    """Kembalikan database dan attachment dari snapshot. Database live ditimpa lewat backup API."""
+    problems = verify_snapshot(snapshot_path)
+    if problems:
+        raise ValueError('Snapshot failed verification: ' + '; '.join(problems))
+
+    manifest = load_manifest(snapshot_path)
+    workspace = tracker.current_workspace()
+    for target_path in (workspace.database, workspace.archive_database):
+        name = os.path.basename(target_path)
+        if name in manifest['databases']:
+            backup_database(os.path.join(snapshot_path, name), target_path)
+        elif os.path.exists(target_path):
+            # Snapshot dibuat sebelum ada arsip: archive database live tidak cocok lagi dengan tracking.db
+            # yang dikembalikan (task dobel, PK bentrok saat archive berikutnya), jadi disisihkan
+            moved_path = move_aside_database(target_path)
+            tracker.app.logger.warning('%s is not in the snapshot, moved aside to %s', name, moved_path)
+
+    os.makedirs(workspace.upload_dir, exist_ok=True)
+    restored = 0
+    for name, info in manifest['uploads'].items():
+        target = os.path.join(workspace.upload_dir, name)
+        if os.path.exists(target) and file_sha256(target) == info['sha256']:
+            continue
+        shutil.copy2(os.path.join(snapshot_path, 'uploads', name), target)
+        restored += 1
+    return restored
+
+def run_scheduled_backup():
+    snapshot_path = create_snapshot()
+    rotate_snapshots()
+    return snapshot_path
+
+def seconds_until_next_backup(interval_seconds):
+    snapshots = list_snapshots()
+    if not snapshots:
+        return 0
+    manifest_path = os.path.join(snapshots[-1], MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return 0
+    age = datetime.now().timestamp() - os.path.getmtime(manifest_path)
+    return max(0, interval_seconds - age)
+
+def start_backup_scheduler(interval_hours=None):
+    """Jalankan backup berkala semua workspace di background thread, dilanjutkan dari umur snapshot terakhir."""
+    interval_seconds = (interval_hours or tracker.app.config['BACKUP_INTERVAL_HOURS']) * 3600
+    stop_event = threading.Event()
+
+    def backup_due_workspaces():
+        # Waktu tunggu berikutnya: snapshot workspace yang paling cepat jatuh tempo
+        wait = interval_seconds
+        for workspace in tracker.list_workspaces():
+            with workspaces.use(workspace):
+                remaining = seconds_until_next_backup(interval_seconds)
+                if remaining <= 0:
+                    remaining = interval_seconds
+                    try:
+                        run_scheduled_backup()
+                    except Exception as e:
+                        tracker.app.logger.error('Scheduled backup of workspace %s failed: %s', workspace.name, e)
+            wait = min(wait, remaining)
+        return wait
+
+    def loop():
+        wait = 0
+        while not stop_event.wait(wait):
+            wait = backup_due_workspaces()
+
+    thread = threading.Thread(target=loop, name='backup-scheduler', daemon=True)
+    thread.start()
+    return stop_event
@@ -0,0 +1,136 @@
+"""Micro-benchmark: repository (projection + tuple rows + direct JSON) vs the old dict path.
+
+Builds a throwaway database with large tables and, for every list endpoint, compares
+`SELECT *` -> sqlite3.Row -> dict -> jsonify against the repository read path.
+
+    python bench_repository.py [--tasks 50000] [--notes 20000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import app as tracker
+import repository
+
+def seed(path, task_count, note_count):
+    random.seed(0)
+    words = [f'word{i}' for i in range(2000)]
+    text = lambda n: ' '.join(random.choices(words, k=n))
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        'INSERT INTO tasks (title, description, status, priority, project, due_date) VALUES (?, ?, ?, ?, ?, ?)',
+        [(text(5), text(60), random.choice(['todo', 'in-progress', 'done']), random.choice(['low', 'medium', 'high']),
+          f'project{i % 20}', f'2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}') for i in range(task_count)]
+    )
+    conn.executemany(
+        'INSERT INTO time_logs (task_id, start_time, end_time, duration) VALUES (?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, ?)',
+        [(i % task_count + 1, i) for i in range(task_count)]
+    )
+    conn.executemany('INSERT INTO notes (title, content) VALUES (?, ?)', [(text(5), text(300)) for _ in range(note_count)])
+    conn.executemany('INSERT INTO note_tags (note_id, tag) VALUES (?, ?)',
+                     [(i % note_count + 1, f'tag{i % 50}') for i in range(note_count * 2)])
+    conn.executemany('INSERT INTO folders (name, position) VALUES (?, ?)', [(f'folder{i}', i) for i in range(500)])
+    conn.executemany(
+        'INSERT INTO server_credentials (title, ip, password, notes, tags) VALUES (?, ?, ?, ?, ?)',
+        [(text(3), '10.0.0.1', 'secret', text(30), '["prod", "db"]') for _ in range(task_count // 10)]
+    )
+    conn.commit()
+    conn.close()
+
+# --- Old path: SELECT * -> sqlite3.Row -> dict -> jsonify ---
+
+def dict_rows(sql):
+    conn = tracker.get_db()
+    rows = [dict(row) for row in conn.execute(sql).fetchall()]
+    conn.close()
+    return rows
+
+def dict_notes():
+    conn = tracker.get_db()
+    notes = []
+    for row in conn.execute('''
+        SELECT n.*, GROUP_CONCAT(DISTINCT nt.tag) as tags, COUNT(DISTINCT na.id) as attachment_count
+        FROM notes n
+        LEFT JOIN note_tags nt ON n.id = nt.note_id
+        LEFT JOIN note_attachments na ON n.id = na.note_id
+        GROUP BY n.id
+        ORDER BY n.updated_at DESC
+    ''').fetchall():
+        note = dict(row)
+        note['tags'] = note['tags'].split(',') if note['tags'] else []
+        notes.append(note)
+    conn.close()
+    return notes
+
+def dict_credentials():
+    credentials = dict_rows('SELECT * FROM server_credentials ORDER BY created_at DESC')
+    for cred in credentials:
+        cred['tags'] = repository.parse_json_tags(cred['tags'])
+    return credentials
+
+DICT_PATHS = {
+    'tasks': lambda: dict_rows('SELECT * FROM tasks ORDER BY created_at DESC'),
+    'time_logs': lambda: dict_rows('SELECT * FROM time_logs ORDER BY start_time DESC'),
+    'notes': dict_notes,
+    'folders': lambda: dict_rows('SELECT * FROM folders ORDER BY position, name'),
+    'credentials': dict_credentials,
+}
+
+PROJECTIONS = {
+    'tasks': repository.TASKS,
+    'time_logs': repository.TIME_LOGS,
+    'notes': repository.NOTES,
+    'folders': repository.FOLDERS,
+    'credentials': repository.CREDENTIALS,
+}
+
+def run_dict_path(name):
+    return tracker.jsonify(DICT_PATHS[name]()).get_data()
+
+def run_repository_path(name):
+    with repository.read_connection(tracker.DATABASE) as conn:
+        payload = repository.fetch_json(conn, PROJECTIONS[name])
+    return tracker.json_response(payload).get_data()
+
+def measure(fn, name, repeat):
+    fn(name)  # warm-up (page cache, statement cache)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(name)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1024 / 1024, len(body) / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--notes', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker.DATABASE = os.path.join(tmp, 'bench.db')
+        tracker.ARCHIVE_DATABASE = os.path.join(tmp, 'bench_archive.db')
+        tracker.init_db()
+        seed(tracker.DATABASE, args.tasks, args.notes)
+
+        print(f'{"endpoint":<12} {"path":<11} {"median ms":>10} {"peak MB":>9} {"body MB":>9}')
+        with tracker.app.app_context():
+            for name in PROJECTIONS:
+                for label, fn in (('dict', run_dict_path), ('repository', run_repository_path)):
+                    latency, peak, size = measure(fn, name, args.repeat)
+                    print(f'{name:<12} {label:<11} {latency:>10.1f} {peak:>9.1f} {size:>9.1f}')
+        repository.close_pools()
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,13 @@
 import webview
+import argparse
 import sys
 import os
-from app import app, init_db
+import threading
+from app import app, init_workspaces, get_workspace, workspace_exists, list_workspaces, get_related_index, start_reminder_schedulers, warn_missing_vendor_assets
+import related_notes
+import backup
+import maintenance
+import workspaces
 
 def get_resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -12,9 +18,78 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def resolve_snapshot(name):
+    if name is None:
+        snapshots = backup.list_snapshots()
+        if not snapshots:
+            sys.exit('No snapshots found')
+        return snapshots[-1]
+    if os.path.isdir(name):
+        return name
+    return os.path.join(backup.get_backup_dir(), name)
+
+def load_related_indexes():
+    for workspace in list_workspaces():
+        with workspaces.use(workspace):
+            get_related_index()
+
+def run_command(args):
+    if args.command == 'backup':
+        snapshot_path = backup.run_scheduled_backup()
+        print(f'Snapshot created: {snapshot_path}')
+    elif args.command == 'list':
+        for snapshot_path in backup.list_snapshots():
+            print(os.path.basename(snapshot_path))
+    elif args.command == 'verify':
+        snapshot_path = resolve_snapshot(args.snapshot)
+        problems = backup.verify_snapshot(snapshot_path)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(1)
+        print(f'Snapshot OK: {snapshot_path}')
+    elif args.command == 'restore':
+        snapshot_path = resolve_snapshot(args.snapshot)
+        restored = backup.restore_snapshot(snapshot_path)
+        print(f'Restored {snapshot_path} ({restored} attachment(s) copied)')
+    elif args.command == 'vacuum':
+        print(maintenance.run_job('convert_auto_vacuum'))
+
 if __name__ == '__main__':
-    # Pastikan database terinisialisasi
-    init_db()
+    parser = argparse.ArgumentParser(description='Second Brain - Tracking System')
+    parser.add_argument('--workspace', default=workspaces.DEFAULT_WORKSPACE,
+                        help='Workspace for backup/vacuum commands (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('backup', help='Create a snapshot now and rotate old ones')
+    subparsers.add_parser('list', help='List snapshots')
+    verify_parser = subparsers.add_parser('verify', help='Verify a snapshot (default: latest)')
+    verify_parser.add_argument('snapshot', nargs='?')
+    restore_parser = subparsers.add_parser('restore', help='Restore a snapshot (default: latest)')
+    restore_parser.add_argument('snapshot', nargs='?')
+    subparsers.add_parser('vacuum', help='One-time VACUUM to switch an existing database to incremental auto_vacuum')
+    args = parser.parse_args()
+
+    # Pastikan database semua workspace terinisialisasi
+    init_workspaces()
+
+    if args.command:
+        workspace = get_workspace(args.workspace) if workspaces.is_valid_name(args.workspace) else None
+        if workspace is None or not workspace_exists(workspace):
+            sys.exit(f'Unknown workspace: {args.workspace}')
+        with workspaces.use(workspace):
+            run_command(args)
+        sys.exit(0)
+
+    warn_missing_vendor_assets()
+
+    # Backup berkala dan maintenance database selama aplikasi berjalan
+    backup.start_backup_scheduler()
+    maintenance.start_maintenance_scheduler()
+    start_reminder_schedulers()
+
+    # Muat (dan samakan) index related notes di background supaya request pertama tidak menunggu
+    if related_notes.available:
+        threading.Thread(target=load_related_indexes, name='related-notes-load', daemon=True).start()
 
     # Membuka jendela aplikasi desktop yang mengarah ke server Flask
     # pywebview bisa langsung menjalankan app Flask
@@ -1,5 +1,12 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import sys
+
+sys.path.insert(0, SPECPATH)
+from vendor_assets import vendor_assets
+
+# Library frontend (static/vendor) ikut di-bundle lewat datas 'static', supaya aplikasi jalan tanpa internet
+vendor_assets()
 
 a = Analysis(
     ['main.py'],
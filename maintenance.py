@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import time
+
+import app as tracker
+import workspaces
+
+# Nama job -> interval minimal antar run (detik)
+JOB_INTERVALS = {
+    'wal_checkpoint': 10 * 60,
+    'incremental_vacuum': 60 * 60,
+    'optimize': 6 * 60 * 60,
+    'integrity_check': 24 * 60 * 60,
+    'compact_journal': 24 * 60 * 60,
+    'archive_tasks': 24 * 60 * 60,
+}
+
+# Seberapa sering scheduler bangun untuk mengecek idle
+CHECK_INTERVAL_SECONDS = 30
+
+# Riwayat maintenance_log yang disimpan
+LOG_RETAIN_DAYS = 90
+
+def is_idle():
+    return time.monotonic() - tracker.last_request_at >= tracker.app.config['MAINTENANCE_IDLE_SECONDS']
+
+def get_page_stats(conn):
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return page_size, page_count, freelist_count
+
+def run_wal_checkpoint(conn):
+    # PASSIVE tidak menunggu reader/writer lain; TRUNCATE hanya kalau benar-benar idle
+    mode = 'TRUNCATE' if is_idle() else 'PASSIVE'
+    busy, log_frames, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+    return f'{mode}: {checkpointed}/{log_frames} frames checkpointed' + (' (busy)' if busy else '')
+
+def run_convert_auto_vacuum(conn):
+    # Mengubah mode auto_vacuum di database yang sudah ada butuh satu VACUUM penuh (lock eksklusif),
+    # jadi hanya dijalankan atas permintaan (`python main.py vacuum`), tidak dari scheduler
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return 'Already incremental auto_vacuum'
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('VACUUM')
+    return 'Converted to incremental auto_vacuum'
+
+def run_incremental_vacuum(conn):
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        # Database lama (dibuat sebelum auto_vacuum=INCREMENTAL di init_db): tunggu konversi manual
+        return 'Skipped: auto_vacuum is not incremental (run `python main.py vacuum`)'
+
+    # Bebaskan halaman kosong per batch kecil, berhenti kalau app tidak idle lagi
+    batch = tracker.app.config['MAINTENANCE_VACUUM_PAGES']
+    freed = 0
+    while is_idle():
+        freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if freelist_count == 0:
+            break
+        conn.execute(f'PRAGMA incremental_vacuum({batch})').fetchall()
+        freed += min(batch, freelist_count)
+    return f'Freed {freed} pages'
+
+def run_optimize(conn):
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'").fetchone()
+    if not has_stats:
+        conn.execute('ANALYZE')
+        return 'ANALYZE'
+    conn.execute('PRAGMA optimize')
+    return 'PRAGMA optimize'
+
+def run_integrity_check(conn):
+    result = conn.execute('PRAGMA quick_check').fetchone()[0]
+    conn.execute(
+        "DELETE FROM maintenance_log WHERE started_at < datetime('now', ?)",
+        (f'-{LOG_RETAIN_DAYS} days',)
+    )
+    return result
+
+def run_compact_journal(conn):
+    removed = tracker.compact_change_journal()
+    return f'Removed {removed} journal entries'
+
+def run_archive_tasks(conn):
+    # Task 'done' yang lebih tua dari ARCHIVE_AFTER_DAYS pindah ke archive database, per batch
+    archived = tracker.archive_completed_tasks()
+    return f'Archived {archived} tasks'
+
+JOBS = {
+    'wal_checkpoint': run_wal_checkpoint,
+    'incremental_vacuum': run_incremental_vacuum,
+    'optimize': run_optimize,
+    'integrity_check': run_integrity_check,
+    'compact_journal': run_compact_journal,
+    'archive_tasks': run_archive_tasks,
+    # Tidak ada di JOB_INTERVALS: hanya dijalankan manual
+    'convert_auto_vacuum': run_convert_auto_vacuum,
+}
+
+def run_job(job):
+    """Jalankan satu job di database workspace aktif dan catat durasi, hasil, serta ukuran database ke maintenance_log."""
+    # isolation_level=None: PRAGMA/VACUUM tidak boleh jalan di dalam transaksi
+    conn = sqlite3.connect(tracker.current_workspace().database, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    started = time.perf_counter()
+    try:
+        result = JOBS[job](conn)
+    except sqlite3.Error as e:
+        result = f'Error: {e}'
+    duration_ms = int((time.perf_counter() - started) * 1000)
+
+    page_size, page_count, freelist_count = get_page_stats(conn)
+    conn.execute(
+        'INSERT INTO maintenance_log (job, duration_ms, result, page_count, freelist_count, db_size) VALUES (?, ?, ?, ?, ?, ?)',
+        (job, duration_ms, result, page_count, freelist_count, page_size * page_count)
+    )
+    conn.close()
+    return result
+
+def get_last_runs():
+    conn = tracker.get_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT job, MAX(strftime('%s', started_at)) as last_run FROM maintenance_log GROUP BY job")
+    last_runs = {row['job']: int(row['last_run']) for row in cursor.fetchall()}
+    conn.close()
+    return last_runs
+
+def run_due_jobs(last_runs, stop_event):
+    """Jalankan job yang sudah jatuh tempo di workspace aktif, berhenti begitu app tidak idle lagi."""
+    for job, interval in JOB_INTERVALS.items():
+        if not is_idle() or stop_event.is_set():
+            return
+        if time.time() - last_runs.get(job, 0) < interval:
+            continue
+        try:
+            run_job(job)
+        except Exception as e:
+            tracker.app.logger.error('Maintenance job %s failed: %s', job, e)
+        last_runs[job] = time.time()
+
+def start_maintenance_scheduler():
+    """Jalankan job maintenance semua workspace di background thread, hanya saat app sedang idle."""
+    stop_event = threading.Event()
+
+    def loop():
+        # Path database -> {job: waktu run terakhir}
+        last_runs = {}
+        while not stop_event.wait(CHECK_INTERVAL_SECONDS):
+            for workspace in tracker.list_workspaces():
+                if not is_idle() or stop_event.is_set():
+                    break
+                with workspaces.use(workspace):
+                    if workspace.database not in last_runs:
+                        last_runs[workspace.database] = get_last_runs()
+                    run_due_jobs(last_runs[workspace.database], stop_event)
+
+    thread = threading.Thread(target=loop, name='maintenance-scheduler', daemon=True)
+    thread.start()
+    return stop_event
@@ -0,0 +1,304 @@
+"""Hashed bag-of-words index over notes.title and notes.content for "related notes".
+
+Each note is stored as an L2-normalized log-tf vector over hashed terms. Document
+frequencies are kept incrementally and IDF is applied only on the query side, so
+adding, updating or removing a note never requires rewriting the other rows.
+
+Entries live in two segments: a main segment sorted by term (posting lists, found
+with searchsorted) and a small append-only delta segment that is merged into the
+main one once it grows.
+"""
+import atexit
+import os
+import re
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+available = np is not None
+
+DIMENSIONS = 2 ** 20
+TITLE_WEIGHT = 2
+MERGE_THRESHOLD = 50000
+SAVE_DELAY_SECONDS = 30
+
+# Di korpus besar, term yang muncul di lebih dari separuh note hampir tidak membedakan
+# dan posting list-nya paling panjang, jadi dilewati saat query
+MAX_DOC_FREQ_RATIO = 0.5
+MAX_DOC_FREQ_MIN_DOCS = 1000
+
+TOKEN = re.compile(r'\w{2,}')
+
+def hash_terms(title, content):
+    tokens = TOKEN.findall((title or '').lower()) * TITLE_WEIGHT + TOKEN.findall((content or '').lower())
+    counts = {}
+    for token in tokens:
+        bucket = zlib.crc32(token.encode('utf-8')) & (DIMENSIONS - 1)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    if not counts:
+        return np.empty(0, np.int32), np.empty(0, np.float32)
+
+    cols = np.fromiter(counts.keys(), np.int32, len(counts))
+    vals = np.log1p(np.fromiter(counts.values(), np.float32, len(counts)))
+    vals /= np.linalg.norm(vals)
+    order = np.argsort(cols)
+    return cols[order], vals[order]
+
+class RelatedNotesIndex:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.save_timer = None
+        self.dirty = False
+
+        self.doc_freq = np.zeros(DIMENSIONS, np.int32)
+        self.doc_count = 0
+
+        # note_id -> (row, cols, vals, stamp)
+        self.notes = {}
+        # row -> note_id, -1 untuk row yang sudah dihapus (buffer dengan kapasitas berlipat)
+        self.row_buffer = np.empty(1024, np.int64)
+        self.row_count = 0
+
+        self.main_cols = np.empty(0, np.int32)
+        self.main_rows = np.empty(0, np.int32)
+        self.main_vals = np.empty(0, np.float32)
+        self.delta = []
+        self.delta_size = 0
+
+    @property
+    def row_note_ids(self):
+        return self.row_buffer[:self.row_count]
+
+    def set_rows(self, row_note_ids):
+        self.row_buffer = np.empty(max(1024, len(row_note_ids) * 2), np.int64)
+        self.row_buffer[:len(row_note_ids)] = row_note_ids
+        self.row_count = len(row_note_ids)
+
+    def append_row(self, note_id):
+        if self.row_count == len(self.row_buffer):
+            self.row_buffer = np.concatenate([self.row_buffer, np.empty(len(self.row_buffer), np.int64)])
+        self.row_buffer[self.row_count] = note_id
+        self.row_count += 1
+        return self.row_count - 1
+
+    # --- Persistence ---
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with np.load(self.path) as data:
+            if int(data['dimensions']) != DIMENSIONS:
+                return False
+            row_note_ids = data['row_note_ids']
+            stamps = data['stamps']
+            cols, rows, vals = data['cols'], data['rows'], data['vals']
+
+        # Rows dikompakkan saat save, jadi semua row hidup. Urutkan per (row, term) untuk vektor per note
+        by_row = np.lexsort((cols, rows))
+        row_cols, row_vals = cols[by_row], vals[by_row]
+        bounds = np.searchsorted(rows[by_row], np.arange(len(row_note_ids) + 1))
+        with self.lock:
+            for row, note_id in enumerate(row_note_ids.tolist()):
+                start, end = bounds[row], bounds[row + 1]
+                self.notes[note_id] = (row, row_cols[start:end], row_vals[start:end], str(stamps[row]))
+            self.doc_freq = np.bincount(cols, minlength=DIMENSIONS).astype(np.int32)
+            self.doc_count = len(row_note_ids)
+            self.set_rows(row_note_ids)
+            self.main_cols, self.main_rows, self.main_vals = cols, rows, vals
+        return True
+
+    def save(self):
+        with self.lock:
+            self.compact()
+            rows = len(self.row_note_ids)
+            stamps = np.array([''] * rows, dtype='U32')
+            for note_id, (row, _, _, stamp) in self.notes.items():
+                stamps[row] = stamp or ''
+            tmp_path = self.path + '.tmp.npz'
+            np.savez(
+                tmp_path,
+                dimensions=np.int64(DIMENSIONS),
+                row_note_ids=self.row_note_ids,
+                stamps=stamps,
+                cols=self.main_cols,
+                rows=self.main_rows,
+                vals=self.main_vals,
+            )
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def schedule_save(self):
+        """Simpan ke disk beberapa detik setelah perubahan terakhir, bukan di setiap update."""
+        self.dirty = True
+        if self.save_timer is None:
+            def run():
+                self.save_timer = None
+                if self.dirty:
+                    self.save()
+            self.save_timer = threading.Timer(SAVE_DELAY_SECONDS, run)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+
+    # --- Updates ---
+
+    def update(self, note_id, title, content, stamp=None):
+        cols, vals = hash_terms(title, content)
+        with self.lock:
+            self._add(note_id, cols, vals, stamp)
+            if self.delta_size >= MERGE_THRESHOLD:
+                self.merge()
+            self.schedule_save()
+
+    def _add(self, note_id, cols, vals, stamp):
+        self._remove(note_id)
+        row = self.append_row(note_id)
+        self.notes[note_id] = (row, cols, vals, stamp)
+        self.doc_freq[cols] += 1
+        self.doc_count += 1
+        self.delta.append((row, cols, vals))
+        self.delta_size += len(cols)
+
+    def remove(self, note_id):
+        with self.lock:
+            if self._remove(note_id):
+                self.schedule_save()
+
+    def _remove(self, note_id):
+        existing = self.notes.pop(note_id, None)
+        if existing is None:
+            return False
+        row, cols, _, _ = existing
+        self.row_buffer[row] = -1
+        self.doc_freq[cols] -= 1
+        self.doc_count -= 1
+        return True
+
+    def merge(self):
+        """Gabungkan delta ke main segment (diurutkan per term)."""
+        if not self.delta:
+            return
+        cols = np.concatenate([self.main_cols] + [cols for _, cols, _ in self.delta])
+        rows = np.concatenate([self.main_rows] + [np.full(len(cols), row, np.int32) for row, cols, _ in self.delta])
+        vals = np.concatenate([self.main_vals] + [vals for _, _, vals in self.delta])
+        order = np.argsort(cols, kind='stable')
+        self.main_cols, self.main_rows, self.main_vals = cols[order], rows[order], vals[order]
+        self.delta = []
+        self.delta_size = 0
+
+    def compact(self):
+        """Merge delta dan buang entri dari row yang sudah dihapus, lalu nomori ulang row."""
+        self.merge()
+        alive = self.row_note_ids >= 0
+        if alive.all():
+            return
+        new_rows = np.cumsum(alive, dtype=np.int64) - 1
+        keep = alive[self.main_rows]
+        self.main_cols = self.main_cols[keep]
+        self.main_rows = new_rows[self.main_rows[keep]].astype(np.int32)
+        self.main_vals = self.main_vals[keep]
+        self.set_rows(self.row_note_ids[alive])
+        for note_id, (row, cols, vals, stamp) in self.notes.items():
+            self.notes[note_id] = (int(new_rows[row]), cols, vals, stamp)
+
+    def reconcile(self, stamps, fetch_notes):
+        """Samakan index dengan database. `stamps`: {note_id: updated_at};
+        `fetch_notes(ids)` mengembalikan (id, title, content, updated_at) untuk note yang perlu di-index ulang."""
+        with self.lock:
+            for note_id in [note_id for note_id in self.notes if note_id not in stamps]:
+                self._remove(note_id)
+            stale = [note_id for note_id, stamp in stamps.items()
+                     if note_id not in self.notes or self.notes[note_id][3] != stamp]
+        # Bulk: semua note masuk delta dulu, lalu satu kali merge (bukan merge tiap MERGE_THRESHOLD)
+        for note_id, title, content, stamp in fetch_notes(stale):
+            cols, vals = hash_terms(title, content)
+            with self.lock:
+                existing = self.notes.get(note_id)
+                if existing is not None and existing[3] is not None and stamp is not None and existing[3] > stamp:
+                    # Sudah di-update (lewat `update`) dengan versi yang lebih baru selama reconcile berjalan
+                    continue
+                self._add(note_id, cols, vals, stamp)
+        if stale:
+            with self.lock:
+                self.merge()
+        return len(stale)
+
+    # --- Queries ---
+
+    def related(self, note_id, k=10):
+        """Top-k note lain dengan cosine similarity (bobot IDF di sisi query). Mengembalikan [(note_id, score)]."""
+        with self.lock:
+            existing = self.notes.get(note_id)
+            if existing is None or self.doc_count < 2:
+                return []
+            own_row, cols, vals, _ = existing
+
+            doc_freq = self.doc_freq[cols]
+            if self.doc_count >= MAX_DOC_FREQ_MIN_DOCS:
+                useful = doc_freq <= MAX_DOC_FREQ_RATIO * self.doc_count
+                cols, vals, doc_freq = cols[useful], vals[useful], doc_freq[useful]
+            if len(cols) == 0:
+                return []
+            idf = np.log((1 + self.doc_count) / (1 + doc_freq)) + 1
+            weights = vals * idf
+            weights /= np.linalg.norm(weights)
+
+            scores = np.zeros(len(self.row_note_ids), np.float32)
+
+            # Main segment: posting list tiap term
+            starts = np.searchsorted(self.main_cols, cols, 'left')
+            ends = np.searchsorted(self.main_cols, cols, 'right')
+            for start, end, weight in zip(starts, ends, weights):
+                if start < end:
+                    scores[self.main_rows[start:end]] += weight * self.main_vals[start:end]
+
+            # Delta segment: satu entri per note
+            for row, delta_cols, delta_vals in self.delta:
+                positions = np.searchsorted(cols, delta_cols).clip(max=len(cols) - 1)
+                match = cols[positions] == delta_cols
+                scores[row] += np.dot(weights[positions[match]], delta_vals[match])
+
+            scores[self.row_note_ids < 0] = 0
+            scores[own_row] = 0
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self.row_note_ids[row]), float(scores[row])) for row in top if scores[row] > 0]
+
+# Satu index per path (workspace)
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(path, load_stamps, fetch_notes):
+    """Index untuk `path`, dimuat dari disk lalu disamakan dengan database saat pertama dipakai.
+
+    Index sudah terdaftar (`loaded_index`) sebelum reconcile, jadi note yang diedit selama index dimuat
+    langsung di-update; pemanggil `get_index` lain tetap menunggu sampai reconcile selesai.
+    """
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = RelatedNotesIndex(path)
+            try:
+                index.load()
+            except (OSError, ValueError, KeyError):
+                index = RelatedNotesIndex(path)
+            _indexes[path] = index
+            try:
+                stale = index.reconcile(load_stamps(), fetch_notes)
+                # Cek ulang stamp: note yang berubah di antara load_stamps() dan fetch_notes() pertama
+                stale += index.reconcile(load_stamps(), fetch_notes)
+            except Exception:
+                del _indexes[path]
+                raise
+            if stale:
+                index.save()
+            atexit.register(lambda: index.dirty and index.save())
+        return index
+
+def loaded_index(path):
+    return _indexes.get(path)
@@ -0,0 +1,173 @@
+"""In-process reminder scheduler for task deadlines.
+
+Upcoming deadlines are kept in a heap ordered by fire time. A single thread sleeps
+until the earliest one instead of polling the tasks table; task changes push new
+entries and wake it. Entries for tasks that were rescheduled, completed or deleted
+are not removed from the heap but skipped when they come up (lazy deletion).
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+
+# Batas tidur thread, supaya lompatan jam sistem (sleep/hibernate) tetap terkejar
+MAX_WAIT_SECONDS = 300
+FIRED_KEEP = 100
+
+def parse_due_date(due_date):
+    """Tanggal due dari string YYYY-MM-DD (atau ISO datetime); None kalau kosong/tidak valid."""
+    if not due_date:
+        return None
+    try:
+        return date.fromisoformat(str(due_date)[:10])
+    except ValueError:
+        return None
+
+def reminder_times(due_date, lead_hours):
+    """(kind, epoch) untuk satu due date: 'due_soon' lead_hours sebelum deadline, 'overdue' saat deadline.
+
+    Deadline = akhir hari due date (waktu lokal), sama seperti checkIfOverdue di client.
+    """
+    deadline = datetime.combine(due_date + timedelta(days=1), datetime.min.time())
+    return [
+        ('due_soon', (deadline - timedelta(hours=lead_hours)).timestamp()),
+        ('overdue', deadline.timestamp()),
+    ]
+
+class ReminderScheduler:
+    def __init__(self, lead_hours=24, on_fire=None):
+        self.lead_hours = lead_hours
+        self.on_fire = on_fire
+        self.condition = threading.Condition()
+        self.heap = []
+        # task_id -> (due_date, title, token); entri heap hanya berlaku kalau token-nya sama
+        self.tasks = {}
+        self.tokens = itertools.count(1)
+        self.fired = deque(maxlen=FIRED_KEEP)
+        self.fired_seq = itertools.count(1)
+        self.last_fired_seq = 0
+        self.stopped = False
+
+    def update(self, task_id, title, due_date, status):
+        """Jadwalkan ulang reminder satu task (atau batalkan kalau tidak ada due date / sudah done)."""
+        due = parse_due_date(due_date) if status != 'done' else None
+        with self.condition:
+            if due is None:
+                self.tasks.pop(task_id, None)
+                return
+            previous = self.tasks.get(task_id)
+            if previous and previous[0] == due:
+                self.tasks[task_id] = (due, title, previous[2])
+                return
+            token = next(self.tokens)
+            self.tasks[task_id] = (due, title, token)
+            now = time.time()
+            for kind, fire_at in reminder_times(due, self.lead_hours):
+                if fire_at > now:
+                    heapq.heappush(self.heap, (fire_at, task_id, kind, token))
+            self.condition.notify()
+
+    def cancel(self, task_id):
+        with self.condition:
+            self.tasks.pop(task_id, None)
+
+    def load(self, tasks):
+        """Isi heap dari (id, title, due_date, status) sekaligus, dengan satu heapify."""
+        now = time.time()
+        with self.condition:
+            for task_id, title, due_date, status in tasks:
+                due = parse_due_date(due_date) if status != 'done' else None
+                if due is None:
+                    continue
+                token = next(self.tokens)
+                self.tasks[task_id] = (due, title, token)
+                for kind, fire_at in reminder_times(due, self.lead_hours):
+                    if fire_at > now:
+                        self.heap.append((fire_at, task_id, kind, token))
+            heapq.heapify(self.heap)
+            self.condition.notify()
+
+    def next_fire_at(self):
+        with self.condition:
+            self._drop_stale()
+            return self.heap[0][0] if self.heap else None
+
+    def _drop_stale(self):
+        while self.heap:
+            _, task_id, _, token = self.heap[0]
+            current = self.tasks.get(task_id)
+            if current is not None and current[2] == token:
+                return
+            heapq.heappop(self.heap)
+
+    def _pop_due(self, now):
+        due_entries = []
+        while True:
+            self._drop_stale()
+            if not self.heap or self.heap[0][0] > now:
+                return due_entries
+            _, task_id, kind, _ = heapq.heappop(self.heap)
+            due_entries.append((task_id, kind))
+
+    def run(self):
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                self._drop_stale()
+                wait = MAX_WAIT_SECONDS
+                if self.heap:
+                    wait = min(wait, max(0, self.heap[0][0] - time.time()))
+                if wait > 0:
+                    self.condition.wait(wait)
+                if self.stopped:
+                    return
+                fired = []
+                for task_id, kind in self._pop_due(time.time()):
+                    due, title, _ = self.tasks[task_id]
+                    seq = next(self.fired_seq)
+                    reminder = {
+                        'seq': seq,
+                        'task_id': task_id,
+                        'title': title,
+                        'kind': kind,
+                        'due_date': due.isoformat(),
+                        'fired_at': datetime.now().isoformat(timespec='seconds'),
+                    }
+                    self.fired.append(reminder)
+                    self.last_fired_seq = seq
+                    fired.append(reminder)
+            # Callback di luar lock supaya update() dari handler lain tidak tertahan
+            for reminder in fired:
+                if self.on_fire:
+                    self.on_fire(reminder)
+
+    def fired_since(self, after=0):
+        with self.condition:
+            return [reminder for reminder in self.fired if reminder['seq'] > after]
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+# Satu scheduler per database (workspace), masing-masing dengan thread sendiri
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def start_scheduler(key, load_tasks, lead_hours=24, on_fire=None):
+    """Scheduler untuk `key` (path database): heap diisi dari `load_tasks()` lalu thread reminder dijalankan."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = ReminderScheduler(lead_hours, on_fire)
+            scheduler.load(load_tasks())
+            thread = threading.Thread(target=scheduler.run, name='reminder-scheduler', daemon=True)
+            thread.start()
+            _schedulers[key] = scheduler
+        return scheduler
+
+def loaded_scheduler(key):
+    return _schedulers.get(key)
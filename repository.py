@@ -0,0 +1,193 @@
+"""Typed read layer for the list and sync endpoints.
+
+Each endpoint reads through a `Projection`: an explicit column list and SQL.
+Rows come back from sqlite3 as plain tuples (no sqlite3.Row) and are written to
+JSON per chunk (`fetch_json`), so only one chunk of rows is in memory at a time.
+
+Reads go through a small pool of long-lived connections per database file, so
+sqlite3's per-connection statement cache actually gets reused across requests.
+Queries by id use `json_each(?)` instead of a variable-length `IN (?, ?, ...)`,
+which keeps the SQL text (and so the cached statement) the same for every call.
+"""
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+POOL_SIZE = 4
+CACHED_STATEMENTS = 256
+JSON_CHUNK_ROWS = 1000
+
+def split_tags(value):
+    return value.split(',') if value else []
+
+def parse_json_tags(value):
+    if not value:
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        return []
+
+class Projection:
+    """Kolom yang dikirim satu endpoint, dalam urutan yang sama dengan tuple row dari `sql`.
+
+    `sql` berisi placeholder `{where}` untuk filter by id (dipakai delta sync).
+    `converters` mengubah nilai kolom tertentu (mis. tags) sebelum dikirim.
+    """
+    def __init__(self, fields, sql, id_column=None, converters=None):
+        self.fields = tuple(fields)
+        self.list_sql = sql.format(where='')
+        self.ids_sql = sql.format(where=f'WHERE {id_column} IN (SELECT value FROM json_each(?))') if id_column else None
+        self.converters = [(self.fields.index(field), convert) for field, convert in (converters or {}).items()]
+
+    def convert(self, rows):
+        if not self.converters:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for index, convert in self.converters:
+                row[index] = convert(row[index])
+            converted.append(row)
+        return converted
+
+TASKS = Projection(
+    ('id', 'title', 'description', 'status', 'priority', 'project', 'due_date',
+     'created_at', 'completed_at', 'time_spent'),
+    '''SELECT id, title, description, status, priority, project, due_date,
+              created_at, completed_at, time_spent
+       FROM tasks {where} ORDER BY created_at DESC''',
+    id_column='id',
+)
+
+TIME_LOGS = Projection(
+    ('id', 'task_id', 'start_time', 'end_time', 'duration'),
+    'SELECT id, task_id, start_time, end_time, duration FROM time_logs {where} ORDER BY start_time DESC',
+    id_column='id',
+)
+
+ACTIVE_TIMERS = Projection(
+    ('id', 'time_spent', 'start_time', 'elapsed'),
+    '''SELECT t.id, t.time_spent, tl.start_time,
+              (strftime('%s', 'now') - strftime('%s', tl.start_time)) as elapsed
+       FROM tasks t
+       JOIN time_logs tl ON t.id = tl.task_id
+       WHERE tl.end_time IS NULL
+       ORDER BY tl.start_time DESC''',
+)
+
+NOTES = Projection(
+    ('id', 'title', 'content', 'task_id', 'folder_id', 'created_at', 'updated_at',
+     'tags', 'attachment_count'),
+    '''SELECT n.id, n.title, n.content, n.task_id, n.folder_id, n.created_at, n.updated_at,
+              (SELECT GROUP_CONCAT(tag) FROM (SELECT DISTINCT tag FROM note_tags WHERE note_id = n.id)) as tags,
+              (SELECT COUNT(*) FROM note_attachments WHERE note_id = n.id) as attachment_count
+       FROM notes n {where} ORDER BY n.updated_at DESC''',
+    id_column='n.id',
+    converters={'tags': split_tags},
+)
+
+FOLDERS = Projection(
+    ('id', 'name', 'parent_id', 'position'),
+    'SELECT id, name, parent_id, position FROM folders {where} ORDER BY position, name',
+    id_column='id',
+)
+
+CREDENTIALS = Projection(
+    ('id', 'title', 'project', 'ip', 'username', 'password', 'cost_usd', 'cost_idr',
+     'notes', 'tags', 'created_at'),
+    '''SELECT id, title, project, ip, username, password, cost_usd, cost_idr, notes, tags, created_at
+       FROM server_credentials {where} ORDER BY created_at DESC''',
+    id_column='id',
+    converters={'tags': parse_json_tags},
+)
+
+# --- Connection pool ---
+
+class ReadPool:
+    """Koneksi read-only yang dipakai ulang antar request (dan antar thread) untuk satu file database."""
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        conn.execute('PRAGMA query_only=1')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+        try:
+            yield conn
+        finally:
+            if self.idle.qsize() < self.size:
+                self.idle.put(conn)
+            else:
+                conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def read_connection(path):
+    """Context manager: koneksi read-only dari pool milik `path`."""
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ReadPool(path)
+    return pool.connection()
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+# --- Queries ---
+
+def execute(conn, projection, ids=None):
+    if ids is None:
+        return conn.execute(projection.list_sql)
+    return conn.execute(projection.ids_sql, (json.dumps(list(ids)),))
+
+def select(conn, projection, ids=None):
+    """Row tuple mentah (sudah dikonversi) untuk projection; `ids` membatasi ke id tertentu."""
+    return projection.convert(execute(conn, projection, ids).fetchall())
+
+def to_json_objects(projection, rows):
+    fields = projection.fields
+    return [dict(zip(fields, row)) for row in rows]
+
+def dumps(projection, rows):
+    """Serialisasi rows (tuple) ke JSON array of objects dalam satu panggilan encoder."""
+    return json.dumps(to_json_objects(projection, rows), separators=(',', ':'))
+
+def fetch_json(conn, projection, ids=None, chunk_size=JSON_CHUNK_ROWS):
+    """JSON array untuk projection sebagai list potongan string (bisa langsung jadi body response).
+
+    Rows dibaca dan diserialisasi per `chunk_size`, jadi list tuple/dict penuh tidak pernah ada di memori.
+    """
+    cursor = execute(conn, projection, ids)
+    parts = ['[']
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        if len(parts) > 1:
+            parts.append(',')
+        parts.append(dumps(projection, projection.convert(rows))[1:-1])
+    parts.append(']')
+    return parts
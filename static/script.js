@@ -5,6 +5,293 @@ let tasksCreatedChart = null;
 let tasksCompletedChart = null;
 let credentials = [];
 
+// Seq change journal terakhir yang sudah diterapkan per tabel; null = harus full load
+let syncSeqs = { tasks: null, notes: null, folders: null, credentials: null };
+
+function compareDesc(field) {
+    return (a, b) => (b[field] || '').localeCompare(a[field] || '');
+}
+
+function compareFolders(a, b) {
+    return (a.position || 0) - (b.position || 0) || a.name.localeCompare(b.name);
+}
+
+function rememberSyncSeq(table, response) {
+    const seq = response.headers.get('X-Change-Seq');
+    syncSeqs[table] = seq !== null ? parseInt(seq, 10) : null;
+}
+
+// Apply rows changed since the last load to the local copy.
+// Returns the merged list, or null when a full reload is needed.
+async function syncTable(table, list, compare) {
+    if (syncSeqs[table] === null) return null;
+
+    const response = await fetch(`/api/sync?since=${syncSeqs[table]}&tables=${table}`);
+    if (!response.ok) return null;
+    const data = await response.json();
+    if (data.reset) {
+        syncSeqs[table] = null;
+        return null;
+    }
+
+    const { upserted, deleted } = data.changes[table];
+    syncSeqs[table] = data.seq;
+    if (upserted.length === 0 && deleted.length === 0) return list;
+
+    const replaced = new Set(deleted);
+    upserted.forEach(row => replaced.add(row.id));
+    const merged = list.filter(item => !replaced.has(item.id)).concat(upserted);
+    merged.sort(compare);
+    return merged;
+}
+
+// --- Keyed / virtualized rendering ---
+
+// Lists longer than this are rendered in a scroll box with only the visible rows in the DOM
+const VIRTUAL_THRESHOLD = 150;
+const VIRTUAL_OVERSCAN_PX = 600;
+const FILTER_DEBOUNCE_MS = 150;
+
+function debounce(fn, wait) {
+    let timeout = null;
+    return (...args) => {
+        clearTimeout(timeout);
+        timeout = setTimeout(() => fn(...args), wait);
+    };
+}
+
+// Make the keyed children of `container` match `items`. Elements are reused while
+// signature(item) is unchanged, rebuilt with create(item) when it changes, and only
+// moved when out of order. Children outside `start`/`end` (spacers) are left alone.
+// update(el, item), if given, runs for every kept element (e.g. to patch nested lists).
+function patchKeyedChildren(container, items, { key, signature, create, update, start = null, end = null }) {
+    if (!container._keyed) {
+        // First keyed render: drop placeholder markup
+        Array.from(container.children).forEach(child => {
+            if (child !== start && child !== end) child.remove();
+        });
+    }
+    const previous = container._keyed || new Map();
+    const next = new Map();
+    const ordered = items.map(item => {
+        const itemKey = key(item);
+        const itemSignature = signature(item);
+        let el = previous.get(itemKey);
+        if (!el || el._signature !== itemSignature) {
+            el = create(item);
+            el._signature = itemSignature;
+        }
+        next.set(itemKey, el);
+        return el;
+    });
+
+    previous.forEach((el, itemKey) => {
+        if (next.get(itemKey) !== el) el.remove();
+    });
+
+    let ref = start ? start.nextSibling : container.firstChild;
+    ordered.forEach((el, index) => {
+        if (el === ref) {
+            ref = ref.nextSibling;
+        } else {
+            container.insertBefore(el, ref || end);
+        }
+        if (update) update(el, items[index]);
+    });
+    container._keyed = next;
+}
+
+function renderEmptyState(container, html) {
+    if (container._virtual) container._virtual.detach();
+    container._keyed = null;
+    container.innerHTML = html;
+}
+
+// Windowed list inside its own scroll box. Row heights are estimated until a row has
+// been rendered once, then measured and cached by key.
+class VirtualList {
+    constructor(container, estimateHeight) {
+        this.container = container;
+        this.estimateHeight = estimateHeight;
+        this.heights = new Map();
+        this.items = [];
+        this.options = null;
+        this.frame = null;
+        this.topSpacer = document.createElement('div');
+        this.bottomSpacer = document.createElement('div');
+        this.onScroll = () => this.scheduleRender();
+    }
+
+    attach() {
+        if (this.container._virtual === this) return;
+        this.container._keyed = null;
+        this.container.innerHTML = '';
+        this.container.classList.add('virtual-scroll');
+        this.container.append(this.topSpacer, this.bottomSpacer);
+        this.container.addEventListener('scroll', this.onScroll, { passive: true });
+        this.container._virtual = this;
+    }
+
+    detach() {
+        if (this.container._virtual !== this) return;
+        this.container.removeEventListener('scroll', this.onScroll);
+        this.container.classList.remove('virtual-scroll');
+        this.container._virtual = null;
+        this.container._keyed = null;
+        this.container.innerHTML = '';
+    }
+
+    setItems(items, options) {
+        this.items = items;
+        this.options = options;
+        this.attach();
+        this.render();
+    }
+
+    scheduleRender() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    heightOf(item) {
+        return this.heights.get(this.options.key(item)) || this.estimateHeight(item);
+    }
+
+    render() {
+        const { items, container } = this;
+        const offsets = new Array(items.length + 1);
+        offsets[0] = 0;
+        for (let i = 0; i < items.length; i++) offsets[i + 1] = offsets[i] + this.heightOf(items[i]);
+
+        // Hidden views have no height yet; render a screenful so the first show is not empty
+        const viewport = container.clientHeight || window.innerHeight;
+        const top = Math.max(0, container.scrollTop - VIRTUAL_OVERSCAN_PX);
+        const bottom = container.scrollTop + viewport + VIRTUAL_OVERSCAN_PX;
+        // First row whose bottom edge is below `top`
+        let lo = 0, hi = items.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (offsets[mid + 1] <= top) lo = mid + 1; else hi = mid;
+        }
+        const first = lo;
+        let last = first;
+        while (last < items.length && offsets[last] < bottom) last++;
+
+        this.topSpacer.style.height = `${offsets[first]}px`;
+        this.bottomSpacer.style.height = `${offsets[items.length] - offsets[last]}px`;
+        const visible = items.slice(first, last);
+        patchKeyedChildren(container, visible, { ...this.options, start: this.topSpacer, end: this.bottomSpacer });
+
+        // Measure what was rendered; re-layout once if the estimates were off
+        let changed = false;
+        let el = this.topSpacer.nextSibling;
+        visible.forEach(item => {
+            const nextEl = el.nextSibling;
+            const height = nextEl.offsetTop - el.offsetTop;
+            const itemKey = this.options.key(item);
+            if (height > 0 && Math.abs((this.heights.get(itemKey) || 0) - height) > 1) {
+                this.heights.set(itemKey, height);
+                changed = true;
+            }
+            el = nextEl;
+        });
+        if (changed) this.scheduleRender();
+    }
+}
+
+// Render `items` into `container`: plain keyed patching for short lists, a VirtualList otherwise
+function renderKeyedList(container, items, options, estimateHeight) {
+    if (items.length <= VIRTUAL_THRESHOLD) {
+        if (container._virtual) container._virtual.detach();
+        patchKeyedChildren(container, items, options);
+        return;
+    }
+    const list = container._virtualList || (container._virtualList = new VirtualList(container, estimateHeight));
+    list.setItems(items, options);
+}
+
+// --- Frame-time trace ---
+// Records frame times (requestAnimationFrame deltas) and render durations while active.
+// Start with ?trace=1 or frameTrace.start() in the console; frameTrace.stop() prints a summary.
+const frameTrace = {
+    active: false,
+    frames: [],
+    renders: {},
+    lastFrame: 0,
+
+    start() {
+        this.active = true;
+        this.frames = [];
+        this.renders = {};
+        this.lastFrame = performance.now();
+        const loop = (now) => {
+            if (!this.active) return;
+            this.frames.push(now - this.lastFrame);
+            this.lastFrame = now;
+            requestAnimationFrame(loop);
+        };
+        requestAnimationFrame(loop);
+    },
+
+    record(name, duration) {
+        if (!this.active) return;
+        (this.renders[name] = this.renders[name] || []).push(duration);
+    },
+
+    summarize(values) {
+        const sorted = [...values].sort((a, b) => a - b);
+        const at = p => sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))] : 0;
+        return {
+            count: sorted.length,
+            p50: +at(0.5).toFixed(1),
+            p95: +at(0.95).toFixed(1),
+            max: +(sorted[sorted.length - 1] || 0).toFixed(1),
+        };
+    },
+
+    stop() {
+        this.active = false;
+        const frames = this.frames.slice(1);
+        const summary = {
+            frames: { ...this.summarize(frames), long: frames.filter(ms => ms > 50).length },
+        };
+        Object.entries(this.renders).forEach(([name, durations]) => {
+            summary[name] = this.summarize(durations);
+        });
+        console.table(summary);
+        return summary;
+    },
+};
+
+// Time a render function into frameTrace (and the DevTools performance timeline)
+function traced(name, fn) {
+    return function (...args) {
+        if (!frameTrace.active) return fn.apply(this, args);
+        const started = performance.now();
+        try {
+            return fn.apply(this, args);
+        } finally {
+            frameTrace.record(name, performance.now() - started);
+            performance.measure(name, { start: started });
+        }
+    };
+}
+
+renderTodoList = traced('renderTodoList', renderTodoList);
+renderKanban = traced('renderKanban', renderKanban);
+renderNotes = traced('renderNotes', renderNotes);
+renderFolderTree = traced('renderFolderTree', renderFolderTree);
+
+if (new URLSearchParams(window.location.search).has('trace')) frameTrace.start();
+
+// Filter inputs re-render on every keystroke; these wait for a pause in typing
+const applyFiltersDebounced = debounce(() => applyFilters(), FILTER_DEBOUNCE_MS);
+const filterNotesDebounced = debounce(() => filterNotes(), FILTER_DEBOUNCE_MS);
+const applyCredentialFiltersDebounced = debounce(() => applyCredentialFilters(), FILTER_DEBOUNCE_MS);
+
 // Configure marked.js for better markdown rendering
 if (typeof marked !== 'undefined') {
     marked.setOptions({
@@ -49,11 +336,148 @@ if (typeof marked !== 'undefined') {
 // Initialize app
 document.addEventListener('DOMContentLoaded', async () => {
     initDefaultFilters();
+    await loadWorkspaces();
     await loadTasks();
     await restoreActiveTimers();
     loadDashboard();
+    startReminderPolling();
 });
 
+// Workspaces: tiap workspace punya database sendiri. Pilihan disimpan di cookie,
+// jadi semua request /api/... ikut ke workspace itu tanpa parameter tambahan
+const WORKSPACE_NAME_PATTERN = /^[a-z0-9][a-z0-9_-]{0,63}$/;
+let currentWorkspace = 'default';
+let workspaceList = [];
+
+async function loadWorkspaces() {
+    try {
+        const response = await fetch('/api/workspaces');
+        const data = await response.json();
+        currentWorkspace = data.current;
+        workspaceList = data.workspaces;
+
+        const select = document.getElementById('workspace-select');
+        select.innerHTML = workspaceList.map(workspace =>
+            `<option value="${workspace.name}">🗂️ ${workspace.name}</option>`
+        ).join('') + '<option value="__new__">+ New Workspace…</option>';
+        select.value = currentWorkspace;
+    } catch (error) {
+        console.error('Error loading workspaces:', error);
+    }
+}
+
+async function switchWorkspace(name) {
+    if (name === '__new__') {
+        document.getElementById('workspace-select').value = currentWorkspace;
+        await createWorkspace();
+        return;
+    }
+    document.cookie = `workspace=${encodeURIComponent(name)}; path=/; max-age=31536000; SameSite=Lax`;
+    // Semua data di client (tasks, notes, sync seq) milik workspace lama, jadi muat ulang halaman
+    window.location.reload();
+}
+
+async function createWorkspace() {
+    const { value: name } = await Swal.fire({
+        title: 'New Workspace',
+        input: 'text',
+        inputLabel: 'Each workspace has its own database and attachments',
+        inputPlaceholder: 'e.g. client-acme',
+        showCancelButton: true,
+        confirmButtonColor: '#6366f1',
+        background: 'var(--bg-secondary)',
+        color: 'var(--text-primary)',
+        inputValidator: (value) => {
+            if (!WORKSPACE_NAME_PATTERN.test(value)) return 'Use lowercase letters, digits, "-" and "_"';
+        }
+    });
+    if (!name) return;
+
+    try {
+        const response = await fetch('/api/workspaces', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ name })
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            Swal.fire({ icon: 'error', title: 'Error', text: data.message, confirmButtonColor: '#6366f1' });
+            return;
+        }
+        switchWorkspace(data.name);
+    } catch (error) {
+        console.error('Error creating workspace:', error);
+    }
+}
+
+// Ringkasan semua workspace di dashboard; server menjalankan query per workspace secara paralel
+async function loadWorkspacesSummary() {
+    const summary = document.getElementById('workspaces-summary');
+    if (workspaceList.length < 2) {
+        summary.style.display = 'none';
+        return;
+    }
+    try {
+        const response = await fetch('/api/workspaces/dashboard');
+        const data = await response.json();
+        const row = (name, stats, className = '') => stats.error ?
+            `<tr class="${className}"><td>${name}</td><td colspan="6" style="color: var(--danger);">${stats.error}</td></tr>` :
+            `<tr class="${className}">
+                <td>${name}</td>
+                <td>${stats.status_counts.todo || 0}</td>
+                <td>${stats.status_counts['in-progress'] || 0}</td>
+                <td>${stats.status_counts.done || 0}</td>
+                <td>${stats.completed_today}</td>
+                <td>${formatTime(stats.total_time)}</td>
+                <td>${formatTime(Math.round(stats.average_time))}</td>
+            </tr>`;
+        document.getElementById('workspaces-summary-body').innerHTML =
+            data.workspaces.map(stats => row(stats.name, stats, stats.name === currentWorkspace ? 'current' : '')).join('') +
+            row('Total', data.total, 'total');
+        summary.style.display = 'block';
+    } catch (error) {
+        console.error('Error loading workspaces summary:', error);
+    }
+}
+
+// Deadline reminders: scheduler di server yang menentukan kapan reminder keluar,
+// client hanya mengambil reminder yang sudah terkirim (dari memori server, bukan query tabel)
+const REMINDER_POLL_MS = 60000;
+
+async function checkReminders() {
+    try {
+        // Tiap workspace punya scheduler (dan seq) sendiri
+        const seqKey = `reminderSeq:${currentWorkspace}`;
+        const after = Number(sessionStorage.getItem(seqKey) || 0);
+        const response = await fetch(`/api/reminders?after=${after}`);
+        if (!response.ok) return;
+        const data = await response.json();
+        // Server restart: seq mulai lagi dari awal
+        const reminders = data.seq < after ? [] : data.reminders;
+        sessionStorage.setItem(seqKey, data.seq);
+        reminders.forEach(showReminder);
+    } catch (error) {
+        console.error('Error checking reminders:', error);
+    }
+}
+
+function showReminder(reminder) {
+    const title = reminder.kind === 'overdue' ? '⚠️ Task overdue' : '⏰ Task due soon';
+    const text = `${reminder.title} (due ${formatDateShort(reminder.due_date)})`;
+    Swal.fire({ icon: reminder.kind === 'overdue' ? 'warning' : 'info', title, text, toast: true, position: 'top-end', showConfirmButton: false, timer: 8000 });
+    if ('Notification' in window && Notification.permission === 'granted') {
+        new Notification(title, { body: text });
+    }
+}
+
+function startReminderPolling() {
+    if ('Notification' in window && Notification.permission === 'default') {
+        Notification.requestPermission();
+    }
+    checkReminders();
+    setInterval(checkReminders, REMINDER_POLL_MS);
+}
+
 // View management
 function showView(viewName) {
     document.querySelectorAll('.view').forEach(view => view.style.display = 'none');
@@ -87,6 +511,7 @@ function showView(viewName) {
 
     if (viewName === 'dashboard') {
         loadDashboard();
+        loadWorkspacesSummary();
     } else if (viewName === 'kanban') {
         renderKanban();
     } else if (viewName === 'todo') {
@@ -102,8 +527,19 @@ function showView(viewName) {
 // Load tasks from API
 async function loadTasks() {
     try {
-        const response = await fetch('/api/tasks');
-        tasks = await response.json();
+        const includeArchived = document.getElementById('filter-include-archived')?.checked;
+        const synced = includeArchived ? null : await syncTable('tasks', tasks, compareDesc('created_at'));
+        if (synced) {
+            tasks = synced;
+        } else {
+            const response = await fetch(includeArchived ? '/api/tasks?include_archived=1' : '/api/tasks');
+            tasks = await response.json();
+            if (includeArchived) {
+                syncSeqs.tasks = null;
+            } else {
+                rememberSyncSeq('tasks', response);
+            }
+        }
         await loadProjects();
         populateProjectFilter();
         renderTodoList();
@@ -174,52 +610,65 @@ async function loadProjects() {
 }
 
 // Render Todo List
+const PRIORITY_ORDER = { 'high': 1, 'medium': 2, 'low': 3 };
+
+function compareDateGroups(a, b) {
+    if (a === 'No Due Date') return 1;
+    if (b === 'No Due Date') return -1;
+    if (a === '🔴 Overdue') return -1;
+    if (b === '🔴 Overdue') return 1;
+    if (a === '📅 Today') return -1;
+    if (b === '📅 Today') return 1;
+    if (a === '📅 Tomorrow') return -1;
+    if (b === '📅 Tomorrow') return 1;
+    return new Date(a) - new Date(b);
+}
+
+// Everything a task card shows; cards are only rebuilt when this changes
+function taskSignature(task) {
+    return [task.title, task.description, task.status, task.priority, task.project, task.due_date,
+        task.created_at, task.time_spent, checkIfOverdue(task), !!activeTimers[task.id]].join('|');
+}
+
 function renderTodoList() {
     const todoList = document.getElementById('todo-list');
-    todoList.innerHTML = '';
 
     // Apply filters
     let filteredTasks = getFilteredTasks();
 
     if (filteredTasks.length === 0) {
-        todoList.innerHTML = '<p style="text-align: center; color: var(--text-secondary); padding: 40px;">No tasks found.</p>';
+        renderEmptyState(todoList, '<p style="text-align: center; color: var(--text-secondary); padding: 40px;">No tasks found.</p>');
         return;
     }
 
-    // Group tasks by date
+    // Group tasks by date, flattened into header + task rows
     const groupedTasks = groupTasksByDate(filteredTasks);
-
-    // Render each date group
-    Object.keys(groupedTasks).sort((a, b) => {
-        if (a === 'No Due Date') return 1;
-        if (b === 'No Due Date') return -1;
-        if (a === '🔴 Overdue') return -1;
-        if (b === '🔴 Overdue') return 1;
-        if (a === '📅 Today') return -1;
-        if (b === '📅 Today') return 1;
-        if (a === '📅 Tomorrow') return -1;
-        if (b === '📅 Tomorrow') return 1;
-        return new Date(a) - new Date(b);
-    }).forEach(dateKey => {
-        const dateGroup = document.createElement('div');
-        dateGroup.className = 'date-group';
-
-        const dateHeader = document.createElement('div');
-        dateHeader.className = 'date-header';
-        dateHeader.textContent = `${dateKey} (${groupedTasks[dateKey].length})`;
-        dateGroup.appendChild(dateHeader);
+    const rows = [];
+    Object.keys(groupedTasks).sort(compareDateGroups).forEach(dateKey => {
+        rows.push({ header: dateKey, count: groupedTasks[dateKey].length });
 
         // Sort tasks by priority within each date group (high -> medium -> low)
-        const priorityOrder = { 'high': 1, 'medium': 2, 'low': 3 };
         groupedTasks[dateKey].sort((a, b) => {
-            return priorityOrder[a.priority || 'medium'] - priorityOrder[b.priority || 'medium'];
-        }).forEach(task => {
-            const taskEl = createTaskElement(task);
-            dateGroup.appendChild(taskEl);
-        });
-
-        todoList.appendChild(dateGroup);
+            return PRIORITY_ORDER[a.priority || 'medium'] - PRIORITY_ORDER[b.priority || 'medium'];
+        }).forEach(task => rows.push({ task }));
     });
+
+    renderKeyedList(todoList, rows, {
+        key: row => row.task ? row.task.id : `header:${row.header}`,
+        signature: row => row.task ? taskSignature(row.task) : row.count,
+        create: row => row.task ? createTaskElement(row.task) : createDateHeader(row.header, row.count),
+    }, row => row.task ? 150 : 50);
+}
+
+function createDateHeader(dateKey, count) {
+    const headerRow = document.createElement('div');
+    headerRow.className = 'date-group-header';
+
+    const dateHeader = document.createElement('div');
+    dateHeader.className = 'date-header';
+    dateHeader.textContent = `${dateKey} (${count})`;
+    headerRow.appendChild(dateHeader);
+    return headerRow;
 }
 
 function groupTasksByDate(tasks) {
@@ -230,6 +679,9 @@ function groupTasksByDate(tasks) {
     const tomorrow = new Date(today);
     tomorrow.setDate(tomorrow.getDate() + 1);
 
+    // formatDate (toLocaleDateString) is slow; thousands of tasks share a few hundred dates
+    const dateLabels = new Map();
+
     tasks.forEach(task => {
         let dateKey = 'No Due Date';
 
@@ -251,7 +703,11 @@ function groupTasksByDate(tasks) {
                 dateKey = '📅 Tomorrow';
             } else {
                 // Use formatted date for display (e.g., "Sun, Jan 4")
-                dateKey = formatDate(task.due_date);
+                dateKey = dateLabels.get(task.due_date);
+                if (dateKey === undefined) {
+                    dateKey = formatDate(task.due_date);
+                    dateLabels.set(task.due_date, dateKey);
+                }
             }
         }
 
@@ -295,7 +751,7 @@ function createTaskElement(task) {
             <span class="task-status status-${task.status}">${getStatusLabel(task.status)}</span>
             <span class="priority-badge priority-${task.priority || 'medium'}">${priorityEmoji[task.priority || 'medium']} ${capitalizeFirst(task.priority || 'medium')}</span>
             ${task.project ? `<span class="task-project">📁 ${task.project}</span>` : ''}
-            <span class="task-time-display">⏱️ ${timeSpent} <button class="edit-time-btn" onclick="editTimeSpent(${task.id}, event)" title="Edit Time">✏️</button></span>
+            <span class="task-time-display">⏱️ <span class="task-time-value">${timeSpent}</span> <button class="edit-time-btn" onclick="editTimeSpent(${task.id}, event)" title="Edit Time">✏️</button></span>
         </div>
         <div class="task-dates">
             ${task.created_at ? `<span class="task-date-item">📅 Created: ${formatDateShort(task.created_at)}</span>` : ''}
@@ -319,57 +775,70 @@ function renderKanban() {
         'in-progress': document.getElementById('kanban-in-progress'),
         'done': document.getElementById('kanban-done')
     };
-
-    Object.values(columns).forEach(col => col.innerHTML = '');
+    setupKanbanDropZones(columns);
 
     // Apply filters
-    const filteredTasks = getFilteredTasks();
+    const tasksByStatus = { 'todo': [], 'in-progress': [], 'done': [] };
+    getFilteredTasks().forEach(task => {
+        if (tasksByStatus[task.status]) tasksByStatus[task.status].push(task);
+    });
 
-    filteredTasks.forEach(task => {
-        const card = document.createElement('div');
-        const isOverdue = checkIfOverdue(task);
-        card.className = `kanban-card priority-${task.priority || 'medium'}${isOverdue ? ' overdue' : ''}`;
-        card.draggable = true;
-        card.dataset.taskId = task.id;
-
-        const priorityEmoji = {
-            'low': '🟢',
-            'medium': '🟡',
-            'high': '🔴'
-        };
+    Object.entries(columns).forEach(([status, column]) => {
+        renderKeyedList(column, tasksByStatus[status], {
+            key: task => task.id,
+            signature: taskSignature,
+            create: createKanbanCard,
+        }, () => 140);
+    });
+}
 
-        const isTimerActive = activeTimers[task.id];
+function createKanbanCard(task) {
+    const card = document.createElement('div');
+    const isOverdue = checkIfOverdue(task);
+    card.className = `kanban-card priority-${task.priority || 'medium'}${isOverdue ? ' overdue' : ''}`;
+    card.draggable = true;
+    card.dataset.taskId = task.id;
 
-        card.innerHTML = `
-            <div class="kanban-card-title">${task.title}</div>
-            <div class="kanban-card-meta">
-                <div class="kanban-card-row">
-                    <span>${priorityEmoji[task.priority || 'medium']} ${capitalizeFirst(task.priority || 'medium')}</span>
-                    ${isOverdue ? '<span class="kanban-overdue-badge">⚠️ Overdue</span>' : ''}
-                </div>
-                ${task.project ? `<div class="kanban-card-project">📁 ${task.project}</div>` : ''}
-                <div class="kanban-card-row">
-                    ${task.created_at ? `<span>📅 ${formatDateShort(task.created_at)}</span>` : ''}
-                    ${task.due_date ? `<span style="${isOverdue ? 'color: var(--danger); font-weight: 600;' : ''}">⏰ ${formatDateShort(task.due_date)}</span>` : ''}
-                </div>
+    const priorityEmoji = {
+        'low': '🟢',
+        'medium': '🟡',
+        'high': '🔴'
+    };
+
+    const isTimerActive = activeTimers[task.id];
+
+    card.innerHTML = `
+        <div class="kanban-card-title">${task.title}</div>
+        <div class="kanban-card-meta">
+            <div class="kanban-card-row">
+                <span>${priorityEmoji[task.priority || 'medium']} ${capitalizeFirst(task.priority || 'medium')}</span>
+                ${isOverdue ? '<span class="kanban-overdue-badge">⚠️ Overdue</span>' : ''}
             </div>
-            <div class="kanban-card-time">⏱️ ${formatTime(task.time_spent)}</div>
-            <div class="kanban-timer-controls">
-                ${!isTimerActive ?
-                    `<button class="kanban-timer-btn kanban-timer-start" onclick="event.stopPropagation(); startTimer(${task.id})">▶️ Start</button>` :
-                    `<button class="kanban-timer-btn kanban-timer-stop" onclick="event.stopPropagation(); stopTimer(${task.id})">⏹️ Stop</button>`
-                }
+            ${task.project ? `<div class="kanban-card-project">📁 ${task.project}</div>` : ''}
+            <div class="kanban-card-row">
+                ${task.created_at ? `<span>📅 ${formatDateShort(task.created_at)}</span>` : ''}
+                ${task.due_date ? `<span style="${isOverdue ? 'color: var(--danger); font-weight: 600;' : ''}">⏰ ${formatDateShort(task.due_date)}</span>` : ''}
             </div>
-        `;
-
-        card.addEventListener('dragstart', handleDragStart);
-        card.addEventListener('click', () => editTask(task.id));
+        </div>
+        <div class="kanban-card-time">⏱️ ${formatTime(task.time_spent)}</div>
+        <div class="kanban-timer-controls">
+            ${!isTimerActive ?
+                `<button class="kanban-timer-btn kanban-timer-start" onclick="event.stopPropagation(); startTimer(${task.id})">▶️ Start</button>` :
+                `<button class="kanban-timer-btn kanban-timer-stop" onclick="event.stopPropagation(); stopTimer(${task.id})">⏹️ Stop</button>`
+            }
+        </div>
+    `;
 
-        columns[task.status].appendChild(card);
-    });
+    card.addEventListener('dragstart', handleDragStart);
+    card.addEventListener('click', () => editTask(task.id));
+    return card;
+}
 
-    // Setup drop zones
+// Drop zones are the columns themselves, so listeners are added once (not on every render)
+function setupKanbanDropZones(columns) {
     Object.entries(columns).forEach(([status, column]) => {
+        if (column.dataset.dropZone) return;
+        column.dataset.dropZone = 'true';
         column.addEventListener('dragover', handleDragOver);
         column.addEventListener('drop', (e) => handleDrop(e, status));
     });
@@ -400,7 +869,9 @@ async function handleDrop(e, newStatus) {
         await updateTaskStatus(task.id, newStatus);
     }
 
-    document.querySelector(`[data-task-id="${draggedTaskId}"]`).style.opacity = '1';
+    // The card may have been re-rendered (or scrolled out of a virtual column) meanwhile
+    const draggedCard = document.querySelector(`[data-task-id="${draggedTaskId}"]`);
+    if (draggedCard) draggedCard.style.opacity = '1';
     draggedTaskId = null;
 
     return false;
@@ -1040,10 +1511,12 @@ function updateTaskTimer(taskId) {
     // Update display without full reload
     const taskElements = document.querySelectorAll(`[data-task-id="${taskId}"]`);
     taskElements.forEach(el => {
-        const timeDisplay = el.querySelector('.task-time-display');
+        const timeDisplay = el.querySelector('.task-time-value');
         if (timeDisplay) {
-            timeDisplay.textContent = `⏱️ ${formatTime(task.time_spent)}`;
+            timeDisplay.textContent = formatTime(task.time_spent);
         }
+        // Patched in place, so the next keyed render can keep this element
+        if (el._signature !== undefined) el._signature = taskSignature(task);
         const kanbanTimeDisplay = el.querySelector('.kanban-card-time');
         if (kanbanTimeDisplay) {
             kanbanTimeDisplay.textContent = `⏱️ ${formatTime(task.time_spent)}`;
@@ -1263,6 +1736,11 @@ function clearFilters() {
     document.getElementById('filter-quick-date').value = '';
     document.getElementById('filter-date-from').value = '';
     document.getElementById('filter-date-to').value = '';
+    const includeArchived = document.getElementById('filter-include-archived');
+    if (includeArchived && includeArchived.checked) {
+        includeArchived.checked = false;
+        loadTasks();
+    }
     applyFilters();
 }
 
@@ -1295,8 +1773,14 @@ let allNoteTags = [];
 // Load credentials from API
 async function loadCredentials() {
     try {
-        const response = await fetch('/api/credentials');
-        credentials = await response.json();
+        const synced = await syncTable('credentials', credentials, compareDesc('created_at'));
+        if (synced) {
+            credentials = synced;
+        } else {
+            const response = await fetch('/api/credentials');
+            credentials = await response.json();
+            rememberSyncSeq('credentials', response);
+        }
         await loadProjects(); // Load projects for dropdown
         await loadAllCredentialTags();
         populateCredentialProjectList();
@@ -1880,8 +2364,14 @@ let currentNoteLinkedNotes = []; // Store linked note IDs for current note
 // Load folders from API
 async function loadFolders() {
     try {
-        const response = await fetch('/api/folders');
-        folders = await response.json();
+        const synced = await syncTable('folders', folders, compareFolders);
+        if (synced) {
+            folders = synced;
+        } else {
+            const response = await fetch('/api/folders');
+            folders = await response.json();
+            rememberSyncSeq('folders', response);
+        }
         renderFolderTree();
         // Don't update dropdowns here if we switch to SweetAlert, but useful for Note Modal
         updateFolderSelects(); 
@@ -1926,73 +2416,82 @@ function renderFolderTree() {
     const treeContainer = document.getElementById('folder-tree');
     if (!treeContainer) return;
 
-    treeContainer.innerHTML = '';
-
-    const renderNode = (parentId, container, isRoot = false) => {
-        // Sort by position, then by name
-        const children = folders
-            .filter(f => f.parent_id === parentId)
-            .sort((a, b) => (a.position - b.position) || a.name.localeCompare(b.name));
-            
-        if (children.length === 0) return;
-
-        // Create a wrapper for children if not root
-        let childrenContainer = container;
-        if (!isRoot) {
-            childrenContainer = document.createElement('div');
-            childrenContainer.className = 'folder-children';
-            container.appendChild(childrenContainer);
-        }
-        
-        children.forEach(folder => {
-            const hasChildren = folders.some(f => f.parent_id === folder.id);
-            const isExpanded = expandedFolders.has(folder.id);
-            const folderWrapper = document.createElement('div');
-            folderWrapper.className = 'folder-wrapper';
-            
-            // Item Row
-            const itemDiv = document.createElement('div');
-            itemDiv.className = `folder-item ${currentFolderId === folder.id ? 'active' : ''}`;
-            itemDiv.draggable = true;
-            itemDiv.dataset.folderId = folder.id;
-            
-            // DnD Events
-            itemDiv.addEventListener('dragstart', handleFolderDragStart);
-            itemDiv.addEventListener('dragover', handleDragOver);
-            itemDiv.addEventListener('dragleave', handleDragLeave);
-            itemDiv.addEventListener('drop', (e) => handleDropToFolder(e, folder.id));
-            itemDiv.addEventListener('click', (e) => {
-                if (!e.target.closest('.folder-actions') && !e.target.closest('.folder-toggle')) {
-                    selectFolder(folder.id);
+    // Sort by position, then by name; grouped once instead of filtering folders per node
+    const childrenByParent = new Map();
+    folders.forEach(folder => {
+        const siblings = childrenByParent.get(folder.parent_id);
+        if (siblings) siblings.push(folder);
+        else childrenByParent.set(folder.parent_id, [folder]);
+    });
+    childrenByParent.forEach(children => children.sort((a, b) => (a.position - b.position) || a.name.localeCompare(b.name)));
+
+    const renderNode = (parentId, container) => {
+        patchKeyedChildren(container, childrenByParent.get(parentId) || [], {
+            key: folder => folder.id,
+            signature: folder => [folder.name, childrenByParent.has(folder.id), expandedFolders.has(folder.id)].join('|'),
+            create: createFolderNode,
+            update: (folderWrapper, folder) => {
+                folderWrapper.firstChild.classList.toggle('active', currentFolderId === folder.id);
+
+                // Recursive Children (only if expanded)
+                let childrenContainer = folderWrapper.querySelector(':scope > .folder-children');
+                if (expandedFolders.has(folder.id) && childrenByParent.has(folder.id)) {
+                    if (!childrenContainer) {
+                        childrenContainer = document.createElement('div');
+                        childrenContainer.className = 'folder-children';
+                        folderWrapper.appendChild(childrenContainer);
+                    }
+                    renderNode(folder.id, childrenContainer);
+                } else if (childrenContainer) {
+                    childrenContainer.remove();
                 }
-            });
-
-            // Toggle Icon
-            const toggleIcon = hasChildren ? (isExpanded ? '▼' : '▶') : '';
-            const toggleClass = hasChildren ? 'folder-toggle' : 'folder-toggle-placeholder';
-            const toggleAction = hasChildren ? `onclick="toggleFolder(event, ${folder.id})"` : '';
-
-            itemDiv.innerHTML = `
-                <span class="${toggleClass}" ${toggleAction}>${toggleIcon}</span>
-                <span class="folder-icon">📁</span>
-                <span class="folder-name">${folder.name}</span>
-                <div class="folder-actions">
-                    <button class="folder-btn" onclick="editFolder(${folder.id})" title="Edit">✏️</button>
-                </div>
-            `;
-            
-            folderWrapper.appendChild(itemDiv);
-            childrenContainer.appendChild(folderWrapper);
-            
-            // Recursive Children (only if expanded)
-            if (isExpanded) {
-                renderNode(folder.id, folderWrapper, false);
-            }
+            },
         });
     };
 
     // Render root items (parent_id: null) directly into treeContainer
-    renderNode(null, treeContainer, true);
+    renderNode(null, treeContainer);
+}
+
+function createFolderNode(folder) {
+    const hasChildren = folders.some(f => f.parent_id === folder.id);
+    const isExpanded = expandedFolders.has(folder.id);
+    const folderWrapper = document.createElement('div');
+    folderWrapper.className = 'folder-wrapper';
+
+    // Item Row
+    const itemDiv = document.createElement('div');
+    itemDiv.className = 'folder-item';
+    itemDiv.draggable = true;
+    itemDiv.dataset.folderId = folder.id;
+
+    // DnD Events
+    itemDiv.addEventListener('dragstart', handleFolderDragStart);
+    itemDiv.addEventListener('dragover', handleDragOver);
+    itemDiv.addEventListener('dragleave', handleDragLeave);
+    itemDiv.addEventListener('drop', (e) => handleDropToFolder(e, folder.id));
+    itemDiv.addEventListener('click', (e) => {
+        if (!e.target.closest('.folder-actions') && !e.target.closest('.folder-toggle')) {
+            selectFolder(folder.id);
+        }
+    });
+
+    // Toggle Icon
+    const toggleIcon = hasChildren ? (isExpanded ? '▼' : '▶') : '';
+    const toggleClass = hasChildren ? 'folder-toggle' : 'folder-toggle-placeholder';
+    const toggleAction = hasChildren ? `onclick="toggleFolder(event, ${folder.id})"` : '';
+
+    itemDiv.innerHTML = `
+        <span class="${toggleClass}" ${toggleAction}>${toggleIcon}</span>
+        <span class="folder-icon">📁</span>
+        <span class="folder-name">${folder.name}</span>
+        <div class="folder-actions">
+            <button class="folder-btn" onclick="editFolder(${folder.id})" title="Edit">✏️</button>
+        </div>
+    `;
+
+    folderWrapper.appendChild(itemDiv);
+    return folderWrapper;
 }
 
 function selectFolder(folderId) {
@@ -2214,15 +2713,9 @@ async function categorizeUncategorized(e) {
             const uncategorizedNotes = allNotes.filter(n => !n.folder_id);
             for (const note of uncategorizedNotes) {
                 await fetch(`/api/notes/${note.id}`, {
-                    method: 'PUT',
+                    method: 'PATCH',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        title: note.title,
-                        content: note.content,
-                        task_id: note.task_id,
-                        folder_id: folder.id,
-                        tags: note.tags
-                    })
+                    body: JSON.stringify({ folder_id: folder.id })
                 });
             }
             
@@ -2342,15 +2835,9 @@ async function handleDropToFolder(e, targetFolderId) {
         const note = notes.find(n => n.id == draggedItem);
         if (note) {
             await fetch(`/api/notes/${draggedItem}`, {
-                method: 'PUT',
+                method: 'PATCH',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    title: note.title,
-                    content: note.content,
-                    task_id: note.task_id,
-                    folder_id: targetFolderId,
-                    tags: note.tags
-                })
+                body: JSON.stringify({ folder_id: targetFolderId })
             });
             loadNotes();
         }
@@ -2374,9 +2861,9 @@ async function handleDropToRoot(e) {
     } else if (draggedType === 'note') {
         const note = notes.find(n => n.id == draggedItem);
         await fetch(`/api/notes/${draggedItem}`, {
-            method: 'PUT',
+            method: 'PATCH',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ ...note, folder_id: null })
+            body: JSON.stringify({ folder_id: null })
         });
         loadNotes();
     }
@@ -2640,9 +3127,16 @@ function selectNoteLink(noteId, noteText) {
 // Load notes from API
 async function loadNotes() {
     try {
-        const response = await fetch('/api/notes');
-        notes = await response.json();
-        allNotes = [...notes];
+        // allNotes holds the unfiltered copy, so delta sync merges into it
+        const synced = await syncTable('notes', allNotes, compareDesc('updated_at'));
+        if (synced) {
+            allNotes = synced;
+        } else {
+            const response = await fetch('/api/notes');
+            allNotes = await response.json();
+            rememberSyncSeq('notes', response);
+        }
+        notes = [...allNotes];
         await loadAllNoteTags();
         filterNotes();
         populateNotesFilters();
@@ -2662,52 +3156,107 @@ async function loadAllNoteTags() {
 }
 
 // Render notes grid
+const NOTE_CARD_MIN_WIDTH = 350;
+const NOTES_GRID_GAP = 20;
+
+// Content is not part of the signature: every content change also bumps updated_at
+function noteSignature(note) {
+    return [note.title, note.updated_at, (note.tags || []).join(','), note.attachment_count, note.task_id].join('|');
+}
+
+// Same column count the CSS grid (auto-fill, minmax(350px, 1fr)) would use
+function notesGridColumns(notesList) {
+    const width = notesList.clientWidth;
+    if (!width) return 3;
+    return Math.max(1, Math.floor((width + NOTES_GRID_GAP) / (NOTE_CARD_MIN_WIDTH + NOTES_GRID_GAP)));
+}
+
 function renderNotes() {
     const notesList = document.getElementById('notes-list');
-    notesList.innerHTML = '';
 
     if (notes.length === 0) {
-        notesList.innerHTML = '<p style="text-align: center; color: var(--text-secondary); padding: 2rem;">No notes found. Create your first note!</p>';
+        renderEmptyState(notesList, '<p style="text-align: center; color: var(--text-secondary); padding: 2rem;">No notes found. Create your first note!</p>');
         return;
     }
 
-    notes.forEach(note => {
-        const noteCard = document.createElement('div');
-        noteCard.className = 'note-card';
-        noteCard.draggable = true;
-        noteCard.dataset.noteId = note.id;
-        noteCard.addEventListener('dragstart', handleNoteDragStart);
+    const cardOptions = { key: note => note.id, signature: noteSignature, create: createNoteCard };
+    if (notes.length <= VIRTUAL_THRESHOLD) {
+        renderKeyedList(notesList, notes, cardOptions);
+        return;
+    }
 
-        // Parse markdown for preview
-        const contentPreview = note.content ?
-            (note.content.substring(0, 200) + (note.content.length > 200 ? '...' : '')) :
-            'No content';
+    // Long lists are virtualized per grid row, so only visible rows of cards exist in the DOM
+    const columns = notesGridColumns(notesList);
+    const rows = [];
+    for (let i = 0; i < notes.length; i += columns) {
+        rows.push(notes.slice(i, i + columns));
+    }
+    renderKeyedList(notesList, rows, {
+        key: row => row.map(note => note.id).join(','),
+        signature: row => `${columns}\n${row.map(noteSignature).join('\n')}`,
+        create: row => {
+            const rowEl = document.createElement('div');
+            rowEl.className = 'notes-grid-row';
+            rowEl.style.gridTemplateColumns = `repeat(${columns}, minmax(0, 1fr))`;
+            row.forEach(note => rowEl.appendChild(createNoteCard(note)));
+            return rowEl;
+        },
+    }, () => 240);
+}
+
+function createNoteCard(note) {
+    const noteCard = document.createElement('div');
+    noteCard.className = 'note-card';
+    noteCard.draggable = true;
+    noteCard.dataset.noteId = note.id;
+    noteCard.addEventListener('dragstart', handleNoteDragStart);
+
+    // Parse markdown for preview
+    const contentPreview = note.content ?
+        (note.content.substring(0, 200) + (note.content.length > 200 ? '...' : '')) :
+        'No content';
+
+    // Tags HTML
+    const tagsHtml = note.tags && note.tags.length > 0 ?
+        note.tags.map(tag => `<span class="note-tag">${tag}</span>`).join('') :
+        '';
+
+    noteCard.innerHTML = `
+        <div class="note-card-header">
+            <h3 class="note-title">${note.title}</h3>
+            <div class="note-actions">
+                <button onclick="viewNote(${note.id})" class="btn-icon" title="View">👁️</button>
+                <button onclick="editNote(${note.id})" class="btn-icon" title="Edit">✏️</button>
+                <button onclick="deleteNote(${note.id})" class="btn-icon" title="Delete">🗑️</button>
+            </div>
+        </div>
+        <div class="note-content-preview">${contentPreview}</div>
+        ${tagsHtml ? `<div class="note-tags">${tagsHtml}</div>` : ''}
+        <div class="note-meta">
+            <span>📅 ${formatNoteDate(note.updated_at || note.created_at)}</span>
+            ${note.attachment_count > 0 ? `<span>📎 ${note.attachment_count}</span>` : ''}
+            ${note.task_id ? `<span>🔗 Task</span>` : ''}
+        </div>
+    `;
+    return noteCard;
+}
 
-        // Tags HTML
-        const tagsHtml = note.tags && note.tags.length > 0 ?
-            note.tags.map(tag => `<span class="note-tag">${tag}</span>`).join('') :
-            '';
+// Re-chunk the virtual notes rows when the grid changes its column count
+window.addEventListener('resize', debounce(() => {
+    const notesList = document.getElementById('notes-list');
+    if (notesList && notesList._virtualList && notes.length > VIRTUAL_THRESHOLD) renderNotes();
+}, FILTER_DEBOUNCE_MS));
 
-        noteCard.innerHTML = `
-            <div class="note-card-header">
-                <h3 class="note-title">${note.title}</h3>
-                <div class="note-actions">
-                    <button onclick="viewNote(${note.id})" class="btn-icon" title="View">👁️</button>
-                    <button onclick="editNote(${note.id})" class="btn-icon" title="Edit">✏️</button>
-                    <button onclick="deleteNote(${note.id})" class="btn-icon" title="Delete">🗑️</button>
-                </div>
-            </div>
-            <div class="note-content-preview">${contentPreview}</div>
-            ${tagsHtml ? `<div class="note-tags">${tagsHtml}</div>` : ''}
-            <div class="note-meta">
-                <span>📅 ${formatNoteDate(note.updated_at || note.created_at)}</span>
-                ${note.attachment_count > 0 ? `<span>📎 ${note.attachment_count}</span>` : ''}
-                ${note.task_id ? `<span>🔗 Task</span>` : ''}
-            </div>
-        `;
+// Lowercased title + content per note object; sync replaces changed objects, so entries never go stale
+const noteSearchText = new WeakMap();
 
-        notesList.appendChild(noteCard);
-    });
+function getNoteSearchText(note) {
+    let text = noteSearchText.get(note);
+    if (text === undefined) {
+        text = `${note.title.toLowerCase()}\n${(note.content || '').toLowerCase()}`;
+        noteSearchText.set(note, text);
+    }
+    return text;
 }
 
 // Filter notes
@@ -2729,9 +3278,7 @@ function filterNotes() {
         
         if (!matchesFolder) return false;
 
-        const matchesSearch = !searchTerm ||
-            note.title.toLowerCase().includes(searchTerm) ||
-            (note.content && note.content.toLowerCase().includes(searchTerm));
+        const matchesSearch = !searchTerm || getNoteSearchText(note).includes(searchTerm);
 
         // Filter by tags (space separated input)
         let matchesTags = true;
@@ -2856,6 +3403,7 @@ async function openAddNoteModal() {
     document.getElementById('note-modal-title').textContent = 'Add New Note';
     document.getElementById('note-form').reset();
     document.getElementById('note-id').value = '';
+    editingNoteBase = null;
     document.getElementById('version-history-section').style.display = 'none';
     document.getElementById('note-attachments-list').innerHTML = '';
     document.getElementById('note-links-container').innerHTML = '';
@@ -2889,13 +3437,46 @@ async function openAddNoteModal() {
 }
 
 // View note (read-only with markdown rendered)
+// Rendered HTML from the server, keyed by note id: { contentHash, html }
+const renderedNoteCache = new Map();
+
+// Fetch cached server-side HTML for a note; null when the server can't render (client falls back to marked)
+async function fetchRenderedNote(noteId) {
+    const cached = renderedNoteCache.get(noteId);
+    const headers = cached ? { 'If-None-Match': `"${cached.contentHash}"` } : {};
+    try {
+        const response = await fetch(`/api/notes/${noteId}/render`, { headers });
+        if (response.status === 304 && cached) return cached.html;
+        if (!response.ok) return null;
+        const data = await response.json();
+        renderedNoteCache.set(noteId, { contentHash: data.content_hash, html: data.html });
+        return data.html;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Related notes dari index di server; kosong kalau index tidak tersedia (501) atau gagal
+async function fetchRelatedNotes(noteId) {
+    try {
+        const response = await fetch(`/api/notes/${noteId}/related?k=5`);
+        return response.ok ? await response.json() : [];
+    } catch (error) {
+        return [];
+    }
+}
+
 async function viewNote(noteId) {
     try {
-        const response = await fetch(`/api/notes/${noteId}`);
+        const [response, serverHtml, relatedNotes] = await Promise.all([
+            fetch(`/api/notes/${noteId}`),
+            fetchRenderedNote(noteId),
+            fetchRelatedNotes(noteId)
+        ]);
         const note = await response.json();
 
         // Render markdown with syntax highlighting
-        const renderedContent = marked.parse(note.content || 'No content available');
+        const renderedContent = serverHtml !== null ? serverHtml : marked.parse(note.content || 'No content available');
 
         // Apply syntax highlighting to any code blocks that weren't highlighted
         setTimeout(() => {
@@ -2922,6 +3503,17 @@ async function viewNote(noteId) {
                 ).join('<br>')}
             </div>` : '';
 
+        // Related notes (kemiripan isi), tanpa note yang sudah di-link
+        const linkedIds = new Set((note.linked_notes || []).map(ln => ln.id));
+        const suggestions = relatedNotes.filter(rn => !linkedIds.has(rn.id));
+        const relatedNotesHtml = suggestions.length > 0 ?
+            `<div style="margin-top: 1rem;">
+                <strong>Related Notes:</strong><br>
+                ${suggestions.map(rn =>
+                    `<a href="#" onclick="viewNote(${rn.id}); return false;" style="color: var(--accent);">✨ ${rn.title}</a>`
+                ).join('<br>')}
+            </div>` : '';
+
         Swal.fire({
             title: note.title,
             html: `
@@ -2931,6 +3523,7 @@ async function viewNote(noteId) {
                 </div>
                 ${attachmentsHtml}
                 ${linkedNotesHtml}
+                ${relatedNotesHtml}
                 <div style="margin-top: 1rem; font-size: 12px; color: var(--text-secondary);">
                     Created: ${formatNoteDate(note.created_at)} | Updated: ${formatNoteDate(note.updated_at)}
                 </div>
@@ -2955,11 +3548,64 @@ async function viewNote(noteId) {
 }
 
 // Edit note
+// Server state of the note open in the editor, used as the base for PATCH saves
+let editingNoteBase = null;
+
+// Single splice that turns `base` into `text` (positions in UTF-16 code units, as the server expects)
+function computeTextDiff(base, text) {
+    if (base === text) return [];
+    const maxLength = Math.min(base.length, text.length);
+    let start = 0;
+    while (start < maxLength && base[start] === text[start]) start++;
+    let end = 0;
+    while (end < maxLength - start && base[base.length - 1 - end] === text[text.length - 1 - end]) end++;
+    return [{ pos: start, delete: base.length - start - end, insert: text.slice(start, text.length - end) }];
+}
+
+function diffSets(before, after) {
+    const beforeKeys = new Set(before.map(String));
+    const afterKeys = new Set(after.map(String));
+    return {
+        add: after.filter(item => !beforeKeys.has(String(item))),
+        remove: before.filter(item => !afterKeys.has(String(item)))
+    };
+}
+
+// Only the fields that differ from editingNoteBase
+function buildNotePatch(noteData) {
+    const base = editingNoteBase;
+    const patch = { base_version: base.version, base_hash: base.content_hash };
+
+    if (noteData.title !== base.title) patch.title = noteData.title;
+    const contentDiff = computeTextDiff(base.content || '', noteData.content);
+    if (contentDiff.length > 0) patch.content_diff = contentDiff;
+    if (String(noteData.task_id || '') !== String(base.task_id || '')) patch.task_id = noteData.task_id;
+    if (String(noteData.folder_id || '') !== String(base.folder_id || '')) patch.folder_id = noteData.folder_id;
+
+    const tags = diffSets(base.tags, noteData.tags);
+    if (tags.add.length || tags.remove.length) patch.tags = tags;
+    const links = diffSets(base.linked_note_ids, noteData.linked_note_ids);
+    if (links.add.length || links.remove.length) patch.linked_note_ids = links;
+
+    return patch;
+}
+
 async function editNote(noteId) {
     try {
         const response = await fetch(`/api/notes/${noteId}`);
         const note = await response.json();
 
+        editingNoteBase = {
+            version: note.version,
+            content_hash: note.content_hash,
+            title: note.title,
+            content: note.content || '',
+            task_id: note.task_id,
+            folder_id: note.folder_id,
+            tags: [...(note.tags || [])],
+            linked_note_ids: note.linked_notes ? note.linked_notes.map(ln => ln.id) : []
+        };
+
         document.getElementById('note-modal-title').textContent = 'Edit Note';
         document.getElementById('note-id').value = note.id;
         document.getElementById('note-title').value = note.title;
@@ -3030,7 +3676,34 @@ async function saveNote(event) {
 
     try {
         let response;
-        if (noteId) {
+        if (noteId && editingNoteBase) {
+            response = await fetch(`/api/notes/${noteId}`, {
+                method: 'PATCH',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(buildNotePatch(noteData))
+            });
+
+            if (response.status === 409) {
+                const conflict = await Swal.fire({
+                    icon: 'warning',
+                    title: 'Note Changed Elsewhere',
+                    text: 'This note was modified since you opened it. Overwrite it with your version?',
+                    showCancelButton: true,
+                    confirmButtonText: 'Overwrite',
+                    cancelButtonText: 'Cancel',
+                    confirmButtonColor: '#ef4444',
+                    background: 'var(--bg-secondary)',
+                    color: 'var(--text-primary)'
+                });
+                if (!conflict.isConfirmed) return;
+
+                response = await fetch(`/api/notes/${noteId}`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(noteData)
+                });
+            }
+        } else if (noteId) {
             response = await fetch(`/api/notes/${noteId}`, {
                 method: 'PUT',
                 headers: { 'Content-Type': 'application/json' },
@@ -3182,6 +3855,9 @@ function insertMarkdown(before, after) {
 }
 
 // Toggle markdown preview
+// Last preview render, reused while the content is unchanged
+let lastPreview = { content: null, html: '' };
+
 function togglePreview() {
     const textarea = document.getElementById('note-content');
     const preview = document.getElementById('note-preview');
@@ -3190,8 +3866,10 @@ function togglePreview() {
     if (preview.style.display === 'none') {
         // Show preview
         const content = textarea.value.trim() || 'Nothing to preview...';
-        const renderedContent = marked.parse(content);
-        preview.innerHTML = renderedContent;
+        if (lastPreview.content !== content) {
+            lastPreview = { content, html: marked.parse(content) };
+        }
+        preview.innerHTML = lastPreview.html;
         preview.style.display = 'block';
         textarea.style.display = 'none';
         toggleBtn.textContent = 'Edit';
@@ -0,0 +1,73 @@
+"""Download pinned frontend libraries into static/vendor so the app starts without network.
+
+Run once after cloning:
+
+    python vendor_assets.py
+
+Every asset is pinned to an exact version and a sha256; a download that does not
+match is rejected. Building with PyInstaller (main.spec) runs this first and fails
+if an asset cannot be downloaded or verified, so the bundle always ships the
+same libraries.
+
+When bumping a version, update the URL and run `python vendor_assets.py --pin`
+(downloads without checking and prints the new sha256 to put in VENDOR_ASSETS).
+"""
+import hashlib
+import os
+import sys
+import urllib.error
+import urllib.request
+
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor')
+
+# Nama file -> (URL versi pasti, sha256). URL dipakai juga sebagai CDN kalau file lokal belum ada (vendor_url di app.py).
+# sha256 None berarti belum di-pin: download ditolak sampai `python vendor_assets.py --pin` dijalankan dan hasilnya diisi di sini.
+VENDOR_ASSETS = {
+    'sweetalert2.all.min.js': ('https://cdn.jsdelivr.net/npm/sweetalert2@11.10.5/dist/sweetalert2.all.min.js', None),
+    'chart.umd.min.js': ('https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js', None),
+    'marked.min.js': ('https://cdn.jsdelivr.net/npm/marked@11.1.1/marked.min.js', None),
+    'highlight.min.js': ('https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js', None),
+    'github-dark.min.css': ('https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github-dark.min.css', None),
+}
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def is_present(filename):
+    """File lokal ada dan cocok dengan sha256 yang di-pin."""
+    path = os.path.join(VENDOR_DIR, filename)
+    sha256 = VENDOR_ASSETS[filename][1]
+    return os.path.exists(path) and sha256 is not None and file_sha256(path) == sha256
+
+def missing_assets():
+    return [filename for filename in VENDOR_ASSETS if not is_present(filename)]
+
+def vendor_assets(force=False, pin=False):
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for filename, (url, sha256) in VENDOR_ASSETS.items():
+        path = os.path.join(VENDOR_DIR, filename)
+        if is_present(filename) and not (force or pin):
+            print(f'{filename}: already present')
+            continue
+        if sha256 is None and not pin:
+            raise SystemExit(f'{filename}: no sha256 pinned in VENDOR_ASSETS, run python vendor_assets.py --pin')
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                data = response.read()
+        except (urllib.error.URLError, OSError) as e:
+            raise SystemExit(f'{filename}: download from {url} failed: {e}')
+        digest = hashlib.sha256(data).hexdigest()
+        if pin:
+            print(f"    '{filename}': ('{url}', '{digest}'),")
+        elif digest != sha256:
+            raise SystemExit(f'{filename}: sha256 mismatch for {url} (expected {sha256}, got {digest})')
+        # Tulis ke file sementara dulu supaya download yang terputus tidak dianggap sudah ada
+        with open(path + '.part', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.part', path)
+        if not pin:
+            print(f'{filename}: {len(data)} bytes from {url}')
+
+if __name__ == '__main__':
+    vendor_assets(force='--force' in sys.argv, pin='--pin' in sys.argv)
@@ -0,0 +1,125 @@
+"""Workspaces: one SQLite database (plus archive, uploads and related-notes index) per workspace.
+
+The default workspace keeps the original file locations, so existing installs are
+unchanged; other workspaces live in their own directory under the workspaces root.
+Splitting data this way gives every workspace its own file and its own write lock.
+
+The active workspace is held in a context variable: set per request by the app and
+per job by background schedulers (`use`). Cross-workspace read-only queries go
+through `fan_out`, which runs the query for every workspace in parallel on that
+workspace's pooled read connection (sqlite3 releases the GIL while a query runs).
+"""
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import repository
+
+DEFAULT_WORKSPACE = 'default'
+DATABASE_NAME = 'tracking.db'
+ARCHIVE_DATABASE_NAME = 'tracking_archive.db'
+RELATED_INDEX_NAME = 'related_notes_index.npz'
+FAN_OUT_WORKERS = 8
+
+# Nama dipakai sebagai nama folder, jadi dibatasi huruf kecil, angka, '-' dan '_'
+NAME_PATTERN = re.compile(r'[a-z0-9][a-z0-9_-]{0,63}')
+
+Workspace = namedtuple('Workspace', ('name', 'database', 'archive_database', 'upload_dir', 'related_index_path'))
+
+def is_valid_name(name):
+    return bool(name) and NAME_PATTERN.fullmatch(name) is not None
+
+def workspace_at(root, upload_root, name):
+    """Workspace `name` di bawah `root` (database) dan `upload_root` (attachment)."""
+    directory = os.path.join(root, name)
+    return Workspace(
+        name,
+        os.path.join(directory, DATABASE_NAME),
+        os.path.join(directory, ARCHIVE_DATABASE_NAME),
+        os.path.join(upload_root, name),
+        os.path.join(directory, RELATED_INDEX_NAME),
+    )
+
+def list_names(root):
+    """Nama workspace di `root` yang sudah punya database, urut nama."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if is_valid_name(name) and os.path.exists(os.path.join(root, name, DATABASE_NAME))
+    )
+
+# --- Workspace aktif ---
+
+_current = ContextVar('workspace', default=None)
+
+def current():
+    return _current.get()
+
+def activate(workspace):
+    """Set workspace aktif; kembalikan token untuk `deactivate`."""
+    return _current.set(workspace)
+
+def deactivate(token):
+    _current.reset(token)
+
+@contextmanager
+def use(workspace):
+    token = activate(workspace)
+    try:
+        yield workspace
+    finally:
+        deactivate(token)
+
+# --- Inisialisasi ---
+
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+def ensure_initialized(workspace, init):
+    """Jalankan `init()` dengan `workspace` aktif, sekali per file database per proses.
+
+    Mengembalikan True kalau init baru saja dijalankan.
+    """
+    if workspace.database in _initialized:
+        return False
+    with _initialized_lock:
+        if workspace.database in _initialized:
+            return False
+        os.makedirs(os.path.dirname(workspace.database), exist_ok=True)
+        with use(workspace):
+            init()
+        _initialized.add(workspace.database)
+    return True
+
+# --- Query lintas workspace ---
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix='workspace-fan-out')
+        return _executor
+
+def fan_out(workspaces, query):
+    """Jalankan `query(conn)` untuk tiap workspace secara paralel, read-only di koneksi pool workspace itu.
+
+    Mengembalikan [(workspace, result, error)] dengan urutan sama seperti `workspaces`;
+    error (pesan sqlite3) satu workspace tidak menggagalkan workspace lain.
+    """
+    def run(workspace):
+        try:
+            with use(workspace), repository.read_connection(workspace.database) as conn:
+                return workspace, query(conn), None
+        except sqlite3.Error as e:
+            return workspace, None, str(e)
+
+    return list(get_executor().map(run, workspaces))